@@ -0,0 +1,41 @@
+# SQLite store for serialized dashboard figures shared by every worker process on a host
+import sqlite3
+import threading
+
+class SQLiteFigureStore:
+    """
+    Serialized figures keyed on (data version, key) in one SQLite file.
+
+    Worker processes of the WSGI server open the same file, so a figure built by one worker
+    is served by all of them. Entries of older data versions are deleted when a newer
+    version is seen. Each thread uses its own connection; WAL mode lets readers run
+    alongside a writer.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS figures (version TEXT, key TEXT, figure TEXT, PRIMARY KEY (version, key))")
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, version, key):
+        row = self._connect().execute("SELECT figure FROM figures WHERE version = ? AND key = ?", (version, key)).fetchone()
+        return row[0] if row else None
+
+    def put(self, version, key, figure):
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO figures (version, key, figure) VALUES (?, ?, ?)", (version, key, figure))
+
+    def retain(self, version):
+        # drop everything built from other versions of the launch data
+        with self._connect() as connection:
+            connection.execute("DELETE FROM figures WHERE version != ?", (version,))
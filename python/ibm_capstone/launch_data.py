@@ -0,0 +1,176 @@
+# Loader for the SpaceX launch records used by the dashboard
+import hashlib
+import io
+import os
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+
+# Columns the dashboard uses and their types; anything else in the file is not read
+SCHEMA = {
+    'Flight Number': 'int32',
+    'Launch Site': 'category',
+    'class': 'int8',
+    'Payload Mass (kg)': 'float64',
+    'Booster Version': 'string',
+    'Booster Version Category': 'category',
+}
+
+def _file_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    if extension in ('.arrow', '.feather', '.ipc'):
+        return 'arrow'
+    raise ValueError(f"unsupported launch data format {extension}")
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _file_digest(path, end):
+    # digest of the first `end` bytes of a file
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while end > 0:
+            chunk = f.read(min(end, 1 << 20))
+            if not chunk:
+                break
+            digest.update(chunk)
+            end -= len(chunk)
+    return digest.hexdigest()
+
+def _row_groups_end(metadata, parts):
+    # file offset where the column chunks of the first `parts` row groups end
+    end = 0
+    for i in range(parts):
+        row_group = metadata.row_group(i)
+        for j in range(row_group.num_columns):
+            column = row_group.column(j)
+            start = column.dictionary_page_offset if column.has_dictionary_page else column.data_page_offset
+            end = max(end, start + column.total_compressed_size)
+    return end
+
+def _batches_digest(reader, parts):
+    # digest of the first `parts` record batches and the dictionaries they use
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, reader.schema) as writer:
+        for i in range(parts):
+            writer.write_batch(reader.get_batch(i))
+    return _digest(sink.getvalue())
+
+def _apply_schema(df):
+    return df[list(SCHEMA)].astype(SCHEMA)
+
+def append_launches(df, new):
+    # Concatenate keeping the categorical columns categorical when new categories appear
+    columns = {}
+    for column in SCHEMA:
+        if SCHEMA[column] == 'category':
+            columns[column] = union_categoricals([df[column], new[column]])
+        else:
+            columns[column] = pd.concat([df[column], new[column]], ignore_index=True)
+    return pd.DataFrame(columns)
+
+class LaunchLog:
+    """
+    Launch records of one file, kept up to date as launches are appended to it.
+
+    refresh() reads only what was added since the last read: the new lines of a CSV,
+    the new row groups of a Parquet file or the new record batches of an Arrow file.
+    Appending is told apart from rewriting by a digest of the part already read; a file that
+    was replaced, truncated or rewritten in place is read again from the start. `version` identifies
+    the state of the file the data was read from and is the same in every process reading it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = _file_format(path)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        stat = os.stat(self.path)
+        self._inode, self._mtime = stat.st_ino, stat.st_mtime_ns
+        if self.format == 'csv':
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            # only complete lines, a line still being written is picked up by the next refresh
+            self._offset = data.rfind(b'\n') + 1
+            self._header = pd.read_csv(io.BytesIO(data[:self._offset]), nrows=0).columns.tolist()
+            self.df = self._parse_csv(data[:self._offset], header=True)
+            self._prefix = _digest(data[:self._offset])
+        elif self.format == 'parquet':
+            parquet = pq.ParquetFile(self.path)
+            self._parts = parquet.num_row_groups
+            self.df = _apply_schema(parquet.read(columns=list(SCHEMA)).to_pandas())
+            self._prefix = _file_digest(self.path, _row_groups_end(parquet.metadata, self._parts))
+        else:
+            # the mapping is kept alive by the buffers referencing it, do not close it here
+            reader = pa.ipc.open_file(pa.memory_map(self.path, 'r'))
+            self._parts = reader.num_record_batches
+            self.df = _apply_schema(reader.read_all().select(list(SCHEMA)).to_pandas())
+            self._prefix = _batches_digest(reader, self._parts)
+        self._set_version()
+
+    def _set_version(self):
+        self.version = f"{self._inode}:{self._mtime}:{len(self.df)}"
+
+    def _parse_csv(self, data, header):
+        return pd.read_csv(io.BytesIO(data), header=0 if header else None, names=None if header else self._header,
+                           usecols=list(SCHEMA), dtype=SCHEMA)
+
+    def _read_new(self):
+        # rows appended since the last read, or None when the file has to be read again in full
+        # because the part read before is gone or no longer the same
+        if self.format == 'csv':
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end < self._offset or _digest(data[:self._offset]) != self._prefix:
+                return None
+            if end == self._offset:
+                return self.df.iloc[:0]
+            new = self._parse_csv(data[self._offset:end], header=False)
+            self._offset, self._prefix = end, _digest(data[:end])
+            return new
+        if self.format == 'parquet':
+            parquet = pq.ParquetFile(self.path)
+            if (parquet.num_row_groups < self._parts
+                    or _file_digest(self.path, _row_groups_end(parquet.metadata, self._parts)) != self._prefix):
+                return None
+            if parquet.num_row_groups == self._parts:
+                return self.df.iloc[:0]
+            new = parquet.read_row_groups(range(self._parts, parquet.num_row_groups), columns=list(SCHEMA))
+            self._parts = parquet.num_row_groups
+            self._prefix = _file_digest(self.path, _row_groups_end(parquet.metadata, self._parts))
+            return _apply_schema(new.to_pandas())
+        reader = pa.ipc.open_file(pa.memory_map(self.path, 'r'))
+        if reader.num_record_batches < self._parts or _batches_digest(reader, self._parts) != self._prefix:
+            return None
+        if reader.num_record_batches == self._parts:
+            return self.df.iloc[:0]
+        batches = [reader.get_batch(i) for i in range(self._parts, reader.num_record_batches)]
+        self._parts = reader.num_record_batches
+        self._prefix = _batches_digest(reader, self._parts)
+        return _apply_schema(pa.Table.from_batches(batches, schema=reader.schema).select(list(SCHEMA)).to_pandas())
+
+    def refresh(self):
+        """Picks up launches added to the file since the last call; returns True when the data changed."""
+        with self._lock:
+            stat = os.stat(self.path)
+            if stat.st_mtime_ns == self._mtime and stat.st_ino == self._inode:
+                return False
+            new = self._read_new() if stat.st_ino == self._inode else None
+            if new is None:
+                self._load()
+                return True
+            self._mtime = stat.st_mtime_ns
+            if len(new) == 0:
+                return False
+            self.df = append_launches(self.df, new)
+            self._set_version()
+            return True
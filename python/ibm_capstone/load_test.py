@@ -0,0 +1,122 @@
+# Load test of the dashboard callbacks under gunicorn at several worker counts
+#   python load_test.py [--workers 1 4 8] [--clients 16] [--duration 10]
+# Reports callback latency p50/p99 and requests per second for each worker count
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+
+SITES = ['ALL', 'CCAFS LC-40', 'VAFB SLC-4E', 'KSC LC-39A', 'CCAFS SLC-40']
+# the discrete payload ranges the slider can produce
+RANGES = [[low, high] for low, high in itertools.combinations(range(0, 10001, 1000), 2)]
+
+def pie_request(site):
+    return {
+        'output': 'success-pie-chart.figure',
+        'outputs': {'id': 'success-pie-chart', 'property': 'figure'},
+        'inputs': [{'id': 'site-dropdown', 'property': 'value', 'value': site}],
+        'changedPropIds': ['site-dropdown.value'],
+    }
+
+def scatter_request(site, payload_range):
+    return {
+        'output': '..success-payload-scatter-chart.figure...scatter-points.data..',
+        'outputs': [{'id': 'success-payload-scatter-chart', 'property': 'figure'},
+                    {'id': 'scatter-points', 'property': 'data'}],
+        'inputs': [{'id': 'site-dropdown', 'property': 'value', 'value': site}],
+        'state': [{'id': 'payload-slider', 'property': 'value', 'value': payload_range}],
+        'changedPropIds': ['site-dropdown.value'],
+    }
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(workers, port, cache_file):
+    env = dict(os.environ, SPACEX_FIGURE_CACHE=cache_file)
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+                               '--log-level', 'warning', 'wsgi:application'],
+                              cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/_dash-layout')
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"gunicorn with {workers} workers did not start")
+
+def post_callback(connection, body):
+    connection.request('POST', '/_dash-update-component', body=json.dumps(body), headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    response.read()
+    if response.status != 200:
+        raise RuntimeError(f"callback failed with {response.status}")
+
+def run_client(port, deadline, latencies, seed):
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    while time.time() < deadline:
+        site = rng.choice(SITES)
+        body = pie_request(site) if rng.random() < 0.5 else scatter_request(site, rng.choice(RANGES))
+        start = time.perf_counter()
+        post_callback(connection, body)
+        latencies.append(time.perf_counter() - start)
+
+def warm_up(port):
+    # build every figure once so the measurement sees the steady state of the shared cache
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    for site in SITES:
+        post_callback(connection, pie_request(site))
+        for payload_range in RANGES:
+            post_callback(connection, scatter_request(site, payload_range))
+
+def load_test(workers, clients, duration, cache_file, warm):
+    port = free_port()
+    server = start_server(workers, port, cache_file)
+    try:
+        if warm:
+            warm_up(port)
+        latencies = []
+        deadline = time.time() + duration
+        threads = [threading.Thread(target=run_client, args=(port, deadline, latencies, seed)) for seed in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+    latencies = np.array(latencies) * 1000
+    print(f"{workers} workers: {len(latencies)} requests, p50 {np.percentile(latencies, 50):.1f}ms, "
+          f"p99 {np.percentile(latencies, 99):.1f}ms, {len(latencies) / elapsed:.0f} req/s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+    # one figure cache for the whole run, the worker counts share its warm-up
+    cache_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.figure_cache.sqlite.loadtest')
+    try:
+        for i, workers in enumerate(args.workers):
+            load_test(workers, args.clients, args.duration, cache_file, warm=i == 0)
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(cache_file + suffix):
+                os.remove(cache_file + suffix)
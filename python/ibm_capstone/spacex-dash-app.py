@@ -1,13 +1,105 @@
 # Import required libraries
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 import dash
 from dash import html
 from dash import dcc
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 import plotly.express as px
+from plotly.io.json import to_json_plotly
+from figure_store import SQLiteFigureStore
+from launch_data import LaunchLog
 
-# Read the airline data into pandas dataframe
-spacex_df = pd.read_csv("spacex_launch_dash.csv")
+# CSV, Parquet or Arrow IPC launch records
+DATA_FILE = os.environ.get("SPACEX_LAUNCH_DATA", "spacex_launch_dash.csv")
+
+def precompute(spacex_df):
+    # Everything the callbacks need, computed once per version of the data
+    launches_by_payload = spacex_df.sort_values('Payload Mass (kg)', kind='stable')
+    launches_by_site = {'ALL': launches_by_payload}
+    launches_by_site.update({site: launches for site, launches in launches_by_payload.groupby('Launch Site', observed=True)})
+    return {
+        # Successful launches per site for the ALL pie chart
+        'success_by_site': spacex_df.groupby('Launch Site', as_index=False, observed=True)['class'].sum(),
+        # Success (1) and failure (0) counts per site
+        'outcomes_by_site': {site: outcomes.groupby('class').size().reset_index(name='counts')
+                             for site, outcomes in spacex_df.groupby('Launch Site', observed=True)},
+        # Launches sorted by payload, for all sites and per site, so a payload range is a contiguous slice
+        'launches_by_site': launches_by_site,
+    }
+
+class FigureCache:
+    """
+    Bounded LRU of serialized callback results keyed on (chart, site, low, high).
+
+    Holds the precomputed launch data the results are built from; when launches are added
+    to the data file they are read in, the data recomputed and every cached result dropped.
+    With a shared `store` a miss is looked up there before building, so worker processes
+    build each figure once between them.
+    """
+
+    def __init__(self, path, maxsize=256, store=None):
+        self.path = path
+        self.maxsize = maxsize
+        self.store = store
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self.launches = LaunchLog(path)
+        self.data = precompute(self.launches.df)
+        self.version = self.launches.version
+
+    def _check_source(self):
+        if self.launches.refresh():
+            data = precompute(self.launches.df)
+            with self._lock:
+                self.data, self.version = data, self.launches.version
+                self._results.clear()
+            if self.store is not None:
+                self.store.retain(self.version)
+
+    def get(self, key, build):
+        """Returns the cached result for key, serializing build(data) on a miss."""
+        self._check_source()
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return json.loads(self._results[key])
+            data, version = self.data, self.version
+        serialized = self.store.get(version, json.dumps(key)) if self.store is not None else None
+        if serialized is None:
+            serialized = to_json_plotly(build(data))
+            if self.store is not None:
+                self.store.put(version, json.dumps(key), serialized)
+        with self._lock:
+            # a reload while building invalidates the result
+            if data is self.data:
+                self._results[key] = serialized
+                while len(self._results) > self.maxsize:
+                    self._results.popitem(last=False)
+        return json.loads(serialized)
+
+    def warm(self, keys, build):
+        """Fills the cache ahead of the first requests, calling build(data, key) for each missing key."""
+        for key in keys:
+            self.get(key, lambda data: build(data, key))
+
+def known_site(entered_site, data):
+    # a cleared dropdown (None) or a site without launches draws empty charts, all under one cache key
+    return entered_site if entered_site in data['launches_by_site'] else None
+
+def payload_slice(payloads, low, high):
+    # Binary search for the [low, high] range in an ascending payload array
+    return slice(np.searchsorted(payloads, low, side='left'), np.searchsorted(payloads, high, side='right'))
+
+# Read the launch data once; the figure cache reloads it when the file changes
+# Under the multi-worker server (wsgi.py) the serialized figures are shared through SQLite
+figure_store = SQLiteFigureStore(os.environ["SPACEX_FIGURE_CACHE"]) if "SPACEX_FIGURE_CACHE" in os.environ else None
+figure_cache = FigureCache(DATA_FILE, store=figure_store)
+spacex_df = figure_cache.data['launches_by_site']['ALL']
 max_payload = spacex_df['Payload Mass (kg)'].max()
 min_payload = spacex_df['Payload Mass (kg)'].min()
 
@@ -55,6 +147,8 @@ app.layout = html.Div(children=[html.H1('SpaceX Launch Records Dashboard',
 
                                 # TASK 4: Add a scatter chart to show the correlation between payload and launch success
                                 html.Div(dcc.Graph(id='success-payload-scatter-chart')),
+                                # Payload sorted points of the selected site, sliced in the browser when the slider moves
+                                dcc.Store(id='scatter-points'),
                                 ])
 
 # TASK 2:
@@ -65,25 +159,23 @@ app.layout = html.Div(children=[html.H1('SpaceX Launch Records Dashboard',
     Input(component_id='site-dropdown', component_property='value')
 )
 def get_pie_chart(entered_site):
+    entered_site = known_site(entered_site, figure_cache.data)
+    return figure_cache.get(('pie', entered_site, None, None), lambda data: build_pie_chart(data, entered_site))
+
+def build_pie_chart(data, entered_site):
     if entered_site == 'ALL':
         # If ALL sites are selected, show total success counts for each site
         fig = px.pie(
-            spacex_df, 
+            data['success_by_site'], 
             values='class', 
             names='Launch Site', 
             title='Total Success Launches by Site'
         )
         return fig
     else:
-        # Filter the dataframe for the specific site
-        filtered_df = spacex_df[spacex_df['Launch Site'] == entered_site]
-        
-        # Group by class to get counts of 0 (Fail) and 1 (Success)
-        site_outcomes = filtered_df.groupby('class').size().reset_index(name='counts')
-        
-        # Render pie chart for the specific site's success/failure ratio
+        # Render pie chart for the specific site's success/failure ratio from the precomputed counts
         fig = px.pie(
-            site_outcomes, 
+            data['outcomes_by_site'].get(entered_site, pd.DataFrame({'class': [], 'counts': []})), 
             values='counts', 
             names='class', 
             title=f"Total Success Launches for site {entered_site}"
@@ -92,34 +184,78 @@ def get_pie_chart(entered_site):
 # TASK 4:
 # Add a callback function for `site-dropdown` and `payload-slider` as inputs, `success-payload-scatter-chart` as output
 # Function decorator to specify function input and output
+# The server only runs when the site changes; payload slider moves are handled by the clientside callback below
 @app.callback(
-    Output(component_id='success-payload-scatter-chart', component_property='figure'),
-    [Input(component_id='site-dropdown', component_property='value'), 
-     Input(component_id="payload-slider", component_property="value")]
+    [Output(component_id='success-payload-scatter-chart', component_property='figure'),
+     Output(component_id='scatter-points', component_property='data')],
+    Input(component_id='site-dropdown', component_property='value'),
+    State(component_id="payload-slider", component_property="value")
 )
 def get_scatter_chart(entered_site, payload_range):
-    # Filter dataframe based on the payload slider range
-    low, high = payload_range
-    mask = (spacex_df['Payload Mass (kg)'] >= low) & (spacex_df['Payload Mass (kg)'] <= high)
-    filtered_df = spacex_df[mask]
+    entered_site = known_site(entered_site, figure_cache.data)
+    low, high = float(payload_range[0]), float(payload_range[1])
+    return figure_cache.get(('scatter', entered_site, low, high), lambda data: build_scatter_chart(data, entered_site, low, high))
 
+def build_scatter_chart(data, entered_site, low, high):
     if entered_site == 'ALL':
-        # Render scatter plot for all sites
-        fig = px.scatter(
-            filtered_df, x='Payload Mass (kg)', y='class',
-            color="Booster Version Category",
-            title='Correlation between Payload and Success for all Sites'
-        )
-        return fig
+        title = 'Correlation between Payload and Success for all Sites'
     else:
-        # Filter for the specific site
-        site_filtered_df = filtered_df[filtered_df['Launch Site'] == entered_site]
-        fig = px.scatter(
-            site_filtered_df, x='Payload Mass (kg)', y='class',
-            color="Booster Version Category",
-            title=f'Correlation between Payload and Success for site {entered_site}'
-        )
-        return fig
+        title = f'Correlation between Payload and Success for site {entered_site}'
+    # Build the figure over the site's whole payload range so every booster category keeps its trace and colour
+    fig = px.scatter(
+        data['launches_by_site'].get(entered_site, data['launches_by_site']['ALL'].iloc[:0]), x='Payload Mass (kg)', y='class',
+        color="Booster Version Category",
+        title=title
+    )
+    # Each trace inherits the payload order of the launches, keep its full points for the browser
+    points = []
+    for trace in fig.data:
+        payloads, classes = np.asarray(trace.x), np.asarray(trace.y)
+        points.append({'x': payloads.tolist(), 'y': classes.tolist()})
+        selected = payload_slice(payloads, low, high)
+        trace.x, trace.y = payloads[selected], classes[selected]
+    return [fig, points]
+
+# Slice each trace to the payload range in the browser with the same binary search, no server round trip
+app.clientside_callback(
+    """
+    function(payloadRange, points, figure) {
+        if (!points || !figure) {
+            return window.dash_clientside.no_update;
+        }
+        function bound(values, target, inclusive) {
+            let lo = 0, hi = values.length;
+            while (lo < hi) {
+                const mid = (lo + hi) >> 1;
+                if (values[mid] < target || (inclusive && values[mid] === target)) {
+                    lo = mid + 1;
+                } else {
+                    hi = mid;
+                }
+            }
+            return lo;
+        }
+        const data = figure.data.map(function(trace, i) {
+            const start = bound(points[i].x, payloadRange[0], false);
+            const stop = bound(points[i].x, payloadRange[1], true);
+            return Object.assign({}, trace, {x: points[i].x.slice(start, stop), y: points[i].y.slice(start, stop)});
+        });
+        return Object.assign({}, figure, {data: data});
+    }
+    """,
+    Output(component_id='success-payload-scatter-chart', component_property='figure', allow_duplicate=True),
+    Input(component_id="payload-slider", component_property="value"),
+    State(component_id='scatter-points', component_property='data'),
+    State(component_id='success-payload-scatter-chart', component_property='figure'),
+    prevent_initial_call=True
+)
+
+# Warm the cache with the charts every session opens with: each site at the initial and the full payload range
+sites = ['ALL'] + sorted(figure_cache.data['outcomes_by_site'])
+figure_cache.warm([('pie', site, None, None) for site in sites], lambda data, key: build_pie_chart(data, key[1]))
+figure_cache.warm([('scatter', site, float(low), float(high)) for site in sites
+                   for low, high in ((min_payload, max_payload), (0, 10000))],
+                  lambda data, key: build_scatter_chart(data, *key[1:]))
 
 # Run the app
 if __name__ == '__main__':
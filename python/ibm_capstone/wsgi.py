@@ -0,0 +1,16 @@
+# Production entry point for the SpaceX dashboard, run from this directory with e.g.
+#   gunicorn --workers 4 --bind 0.0.0.0:8050 wsgi:application
+# Every worker imports the app; the serialized figures are shared through the SQLite file in SPACEX_FIGURE_CACHE
+import importlib.util
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("SPACEX_FIGURE_CACHE", os.path.join(HERE, ".figure_cache.sqlite"))
+
+# spacex-dash-app.py is not a valid module name, load it from its path
+spec = importlib.util.spec_from_file_location("spacex_dash_app", os.path.join(HERE, "spacex-dash-app.py"))
+spacex_dash_app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(spacex_dash_app)
+
+app = spacex_dash_app.app
+application = app.server
@@ -1,7 +1,19 @@
-import time
+import asyncio
+import os
 
 import mesop as me
 
+from model_client import StreamingModelClient, start_mock_server
+
+# MODEL_SERVER=host:port points the chat at a real model server, otherwise a local mock is started
+if os.environ.get("MODEL_SERVER"):
+  host, port = os.environ["MODEL_SERVER"].rsplit(":", 1)
+  MODEL_ADDRESS = (host, int(port))
+else:
+  MODEL_ADDRESS = start_mock_server()
+
+model_client = StreamingModelClient(*MODEL_ADDRESS)
+
 
 @me.stateclass
 class State:
@@ -145,7 +157,7 @@ def textarea_on_blur(e: me.InputBlurEvent):
   state.input = e.value
 
 
-def click_send(e: me.ClickEvent):
+async def click_send(e: me.ClickEvent):
   state = me.state(State)
   if not state.input:
     return
@@ -154,19 +166,23 @@ def click_send(e: me.ClickEvent):
   state.input = ""
   yield
 
-  for chunk in call_api(input):
-    state.output += chunk
-    yield
-  state.in_progress = False
+  try:
+    # awaiting tokens leaves the event loop free for the other chats
+    async for chunk in call_api(input):
+      state.output += chunk
+      yield
+  except (OSError, asyncio.TimeoutError, ValueError):
+    # refused connection, no token within token_timeout, stream closed or garbled by the server
+    state.output += "\n\n_The model did not answer, please try again._"
+  finally:
+    # also when the handler is cancelled, so the spinner never outlives the request
+    state.in_progress = False
   yield
 
 
 def call_api(input):
-  # Replace this with an actual API call
-  time.sleep(0.5)
-  yield "Example of streaming an output"
-  time.sleep(1)
-  yield "\n\nOutput: " + input
+  # stopping the handler closes the stream, which cancels the request on the server
+  return model_client.stream(input)
 
 
 def output():
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import threading
+from typing import AsyncIterator
+
+
+class MockModelServer:
+  """Local stand-in for a streaming model endpoint.
+
+  Speaks newline-delimited JSON over TCP: a {"prompt": ...} line is answered with one
+  {"token": ...} line per token, `token_delay` seconds apart, and a final {"done": true}.
+  Every token waits for the socket to drain, so a slow reader slows the generation down
+  instead of piling up output, and a client that goes away stops it.
+  """
+
+  def __init__(self, token_delay: float = 0.05, host: str = "127.0.0.1", port: int = 0):
+    self.token_delay = token_delay
+    self.host = host
+    self.port = port
+    self._server = None
+
+  async def start(self):
+    self._server = await asyncio.start_server(self._handle, self.host, self.port)
+    self.port = self._server.sockets[0].getsockname()[1]
+    return self
+
+  async def stop(self):
+    self._server.close()
+    await self._server.wait_closed()
+
+  def tokens(self, prompt: str):
+    yield "Example of streaming an output"
+    for word in f"\n\nOutput: {prompt}".split(" "):
+      yield word + " "
+
+  async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+      while line := await reader.readline():
+        prompt = json.loads(line)["prompt"]
+        for token in self.tokens(prompt):
+          await asyncio.sleep(self.token_delay)
+          writer.write((json.dumps({"token": token}) + "\n").encode())
+          await writer.drain()
+        writer.write(b'{"done": true}\n')
+        await writer.drain()
+    except ConnectionError:
+      pass
+    finally:
+      writer.close()
+
+
+def start_mock_server(token_delay: float = 0.05):
+  """Runs a MockModelServer on its own event loop thread and returns its (host, port)."""
+  loop = asyncio.new_event_loop()
+  threading.Thread(target=loop.run_forever, name="mock-model-server", daemon=True).start()
+  server = asyncio.run_coroutine_threadsafe(MockModelServer(token_delay).start(), loop).result()
+  return server.host, server.port
+
+
+class StreamingModelClient:
+  """Streams completions from a model server speaking the MockModelServer protocol.
+
+  The connections live on one background event loop shared by every chat, whatever loop or
+  thread the caller runs on; stream() hands each read to that loop and awaits the result, so
+  the pool is shared, at most `pool_size` requests run at once and a finished request hands
+  its connection to the next one. Tokens are read one at a time as the caller asks for them,
+  so a slow consumer pushes back on the server through TCP flow control. Closing or
+  cancelling the stream drops its connection, which stops the generation on the server.
+  """
+
+  def __init__(self, host: str, port: int, pool_size: int = 8, token_timeout: float = 30, buffer_limit: int = 64 * 1024):
+    self.host = host
+    self.port = port
+    self.token_timeout = token_timeout
+    self.buffer_limit = buffer_limit
+    self._idle = []
+    self._slots = asyncio.Semaphore(pool_size)
+    self.loop = asyncio.new_event_loop()
+    threading.Thread(target=self.loop.run_forever, name="model-client", daemon=True).start()
+
+  async def _call(self, coroutine):
+    # runs on the client loop, awaited from the caller's loop; cancelling the wait cancels the call
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self.loop))
+
+  async def _open(self, prompt: str):
+    await self._slots.acquire()
+    writer = None
+    try:
+      if self._idle:
+        reader, writer = self._idle.pop()
+      else:
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=self.buffer_limit)
+      writer.write((json.dumps({"prompt": prompt}) + "\n").encode())
+      await writer.drain()
+      return reader, writer
+    except BaseException:
+      if writer is not None:
+        writer.close()
+      self._slots.release()
+      raise
+
+  async def _next_token(self, connection):
+    line = await asyncio.wait_for(connection[0].readline(), self.token_timeout)
+    if not line:
+      raise ConnectionError("model server closed the connection")
+    return json.loads(line).get("token")
+
+  async def _release(self, connection, finished: bool):
+    # a stream that was not read to the end leaves the connection mid-response
+    if finished:
+      self._idle.append(connection)
+    else:
+      connection[1].close()
+    self._slots.release()
+
+  def _release_opened(self, future):
+    if future.exception() is None:
+      asyncio.run_coroutine_threadsafe(self._release(future.result(), False), self.loop)
+
+  async def stream(self, prompt: str) -> AsyncIterator[str]:
+    # opening is not cancelled with the caller: a connection opened just as the caller gave up
+    # would be lost along with its pool slot, it is released as soon as it is open instead
+    opening = asyncio.run_coroutine_threadsafe(self._open(prompt), self.loop)
+    try:
+      connection = await asyncio.shield(asyncio.wrap_future(opening))
+    except asyncio.CancelledError:
+      opening.add_done_callback(self._release_opened)
+      raise
+    finished = False
+    try:
+      while (token := await self._call(self._next_token(connection))) is not None:
+        yield token
+      finished = True
+    finally:
+      # not awaited, so the connection is also released when the caller's loop is going away
+      asyncio.run_coroutine_threadsafe(self._release(connection, finished), self.loop)
+
+  def close(self):
+    async def close_idle():
+      while self._idle:
+        self._idle.pop()[1].close()
+    asyncio.run_coroutine_threadsafe(close_idle(), self.loop).result()
+    self.loop.call_soon_threadsafe(self.loop.stop)
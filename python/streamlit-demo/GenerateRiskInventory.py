@@ -1,7 +1,16 @@
+import itertools
+import math
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+from scipy.special import ndtr
 from scipy.stats import norm
 
+# normalisation constant of the standard normal pdf, as used by scipy.stats.norm
+NORM_PDF_C = np.sqrt(2 * np.pi)
+
 # util functions for option valuation
 
 def calculate_d1(S, K, r, sigma, T):
@@ -119,130 +128,533 @@ def black_scholes_gamma(S, K, r, sigma, T):
   gamma = norm.pdf(d1) / (S * sigma * np.sqrt(T)) / 100
   return gamma
 
-def initialize_risk_data() -> pd.DataFrame:
-
-  riskInventory:pd.DataFrame = pd.DataFrame()
-
-  # define spot vol grid
-  spot_moves = [-0.99, -0.25, -0.15, -0.05, 0, 0.05, 0.15, 0.25]
-  vol_moves = [-0.1, -0.05, -0.02, 0, 0.02, 0.05, 0.1]
-
-  assets_in_portfolio = pd.DataFrame(columns=['Asset', 'Sector', 'SubSector', 'Desk'])
-  new_rows = [
-      {'Asset': 'AAPL', 'Sector': 'Technology', 'SubSector': 'Consumer Electronics', 'Desk': 'Equity'},
-      {'Asset': 'MSFT', 'Sector': 'Technology', 'SubSector': 'Software', 'Desk': 'Equity'},
-      {'Asset': 'GOOG', 'Sector': 'Technology', 'SubSector': 'Internet', 'Desk': 'Equity'},
-      {'Asset': 'AMZN', 'Sector': 'Consumer Discretionary', 'SubSector': 'E-commerce', 'Desk': 'Equity'},
-      {'Asset': 'TSLA', 'Sector': 'Consumer Discretionary', 'SubSector': 'Automobiles', 'Desk': 'Equity'},
-      {'Asset': 'NVDA', 'Sector': 'Semi Conductor', 'SubSector': 'Semiconductors', 'Desk': 'Equity'},
-      {'Asset': 'ASML', 'Sector': 'Semi Conductor', 'SubSector': 'Semiconductors', 'Desk': 'Equity'},
-      {'Asset': 'INTC', 'Sector': 'Semi Conductor', 'SubSector': 'Semiconductors', 'Desk': 'Equity'},
-      {'Asset': 'QCOM', 'Sector': 'Semi Conductor', 'SubSector': 'Semiconductors', 'Desk': 'Equity'},
-      {'Asset': 'AMD', 'Sector': 'Semi Conductor', 'SubSector': 'Semiconductors', 'Desk': 'Equity'},
-      {'Asset': 'JNJ', 'Sector': 'Healthcare', 'SubSector': 'Pharmaceuticals', 'Desk': 'Equity'},
-      {'Asset': 'V', 'Sector': 'Financials', 'SubSector': 'Payment Processing', 'Desk': 'Equity'},
-      {'Asset': 'MA', 'Sector': 'Financials', 'SubSector': 'Payment Processing', 'Desk': 'Equity'},
-      {'Asset': 'PG', 'Sector': 'Consumer Staples', 'SubSector': 'Household Products', 'Desk': 'Equity'},
-      {'Asset': 'UNH', 'Sector': 'Healthcare', 'SubSector': 'Managed Care', 'Desk': 'Equity'},
-      {'Asset': 'HD', 'Sector': 'Consumer Discretionary', 'SubSector': 'Home Improvement', 'Desk': 'Equity'},
-      {'Asset': 'BAC', 'Sector': 'Financials', 'SubSector': 'Banks', 'Desk': 'Equity'},
-      {'Asset': 'CRM', 'Sector': 'Technology', 'SubSector': 'Software', 'Desk': 'Equity'},
-      {'Asset': 'PYPL', 'Sector': 'Technology', 'SubSector': 'Financial Technology', 'Desk': 'Equity'},
-      {'Asset': 'ADBE', 'Sector': 'Technology', 'SubSector': 'Software', 'Desk': 'Equity'}
-  ]
-  assets_in_portfolio = pd.concat([assets_in_portfolio, pd.DataFrame(new_rows)], ignore_index=True)
-  #
-
-  for index, row in assets_in_portfolio.iterrows():
-    asset = row['Asset']
-    sector = row['Sector']
-    subsector = row['SubSector']
-    desk = row['Desk']
-
-    print(f"Generating risk inventory for {asset}")
-
-    # Assuming some constant values for S, r, sigma
-    S = 1
-    r = 0.05
-    sigma = 0.2
-
-    # randomly determine the number of positions
-    num_positions = int(abs(np.random.normal(loc=20, scale=30)))
-
-    temp_df = pd.DataFrame()
-
-    # Randomly generate options
-    # Position Size: Normally distributed with mean 100 and standard deviation 20
-    quantities = np.random.normal(loc=10e6, scale=20, size=num_positions)
-
-    # Call or Put: Either 1 or -1
-    call_or_puts = np.random.choice([-1, 1], size=num_positions)
-
-    # Long or short: Either 1 or -1
-    long_shorts = np.random.choice([-1, 1], size=num_positions)
-
-    # Strike of the options: Randomly distributed with mean 1, range 0.5 to 2
-    strikes = np.random.uniform(low=0.5, high=2, size=num_positions)
-
-    # Tenors of the options: All positive, centered around 0.5, no more than 3
-    tenors = np.random.triangular(left=0, mode=0.5, right=3, size=num_positions)
-
-
-    # Assuming some constant values for S, r, sigma
-    S = 1
-    r = 0.05
-    sigma = 0.2
-
-    for i in range(num_positions):
-      call_put_str = 'Call' if call_or_puts[i] == 1 else 'Put'
-      position_name = asset + ' ' + call_put_str + ' ' + str(strikes[i].round(2)) + ' ' + str(tenors[i].round(2)) + 'Y'
-
-      delta = long_shorts[i] * quantities[i] * black_scholes_delta(call_or_puts[i], S, strikes[i], r, sigma, tenors[i])
-      vega = long_shorts[i] * quantities[i] * black_scholes_vega(S, strikes[i], r, sigma, tenors[i])
-      gamma = long_shorts[i] * quantities[i] * black_scholes_gamma(S, strikes[i], r, sigma, tenors[i])
-
-      temp_df = pd.concat([temp_df, pd.DataFrame({'Position': position_name, 'Metric': ['DELTA', 'VEGA', 'GAMMA'], 'RiskValue': [delta, vega, gamma]})], ignore_index=True)
-
-      for spot_move in spot_moves:
-        for vol_move in vol_moves:
-          new_spot = S * (1 + spot_move)
-          new_vol = sigma * (1 + vol_move)
-
-          original_price = black_scholes_price(call_or_puts[i], S, strikes[i], r, sigma, tenors[i])
-          new_price = black_scholes_price(call_or_puts[i], new_spot, strikes[i], r, new_vol, tenors[i])
-          price_change = long_shorts[i] * quantities[i] * (new_price - original_price)
-
-          temp_df = pd.concat([temp_df, pd.DataFrame({'Position': [position_name],
-                                                      'Metric': ['SpotVol'],
-                                                      'SpotMove': [spot_move],
-                                                      'VolMove': [vol_move],
-                                                      'RiskValue': [price_change]})], ignore_index=True)
-
-    # Enter a Delta hedge position
-    position_name = asset
-    delta = -1 * temp_df.loc[temp_df['Metric'] == 'DELTA', 'RiskValue'].sum()
-
-    temp_df = pd.concat([temp_df, pd.DataFrame({'Position': [position_name], 'Metric': ['DELTA'], 'RiskValue': [delta]})], ignore_index=True)
-
-    for spot_move in spot_moves:
-      for vol_move in vol_moves:
-        price_change = delta * spot_move
-
-        temp_df = pd.concat([temp_df, pd.DataFrame({'Position': [position_name],
-                                                    'Metric': ['SpotVol'],
-                                                    'SpotMove': [spot_move],
-                                                    'VolMove': [vol_move],
-                                                    'RiskValue': [price_change]})], ignore_index=True)
-
-
-
-    temp_df['Asset'] = asset
-    temp_df['Sector'] = sector
-    temp_df['SubSector'] = subsector
-    temp_df['Desk'] = desk
 
-    riskInventory = pd.concat([riskInventory, temp_df], ignore_index=True)
-    return riskInventory
+def black_scholes_all(call_or_put, S, K, r, sigma, T):
+  """
+  Calculates the option price and Greeks together using the Black-Scholes formula.
+
+  d1, d2, the normal pdf/cdf terms and the discount factor are computed
+  once and shared, and scipy.special.ndtr is called directly to skip the
+  per-call overhead of scipy.stats.norm. Works on scalars and arrays alike,
+  with the same results as the separate black_scholes_* functions.
+
+  Args:
+    call_or_put: 1 for call, -1 for put
+    S: Current stock price.
+    K: Strike price.
+    r: Risk-free interest rate.
+    sigma: Volatility of the underlying asset.
+    T: Time to maturity.
+
+  Returns:
+    A dict with the option 'price', 'delta', 'vega' and 'gamma'.
+  """
+  sqrt_T = np.sqrt(T)
+  sigma_sqrt_T = sigma * sqrt_T
+  d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / sigma_sqrt_T
+  d2 = d1 - sigma_sqrt_T
+  pdf_d1 = np.exp(-d1 ** 2 / 2.0) / NORM_PDF_C
+  discount = np.exp(-r * T)
+  return {
+    'price': call_or_put * S * ndtr(call_or_put * d1) - call_or_put * K * discount * ndtr(call_or_put * d2),
+    'delta': call_or_put * S * ndtr(d1),
+    'vega': S * pdf_d1 * sqrt_T / 100,
+    'gamma': pdf_d1 / (S * sigma_sqrt_T) / 100,
+  }
+
+
+def price_positions(call_or_put, K, T, quantity, long_short, S, r, sigma):
+  """
+  Prices a batch of option positions and their Greeks in one vectorized pass.
+
+  All position arguments are NumPy arrays of the same length, so a whole
+  portfolio is valued with a single black_scholes_all call instead of one
+  scipy call per position.
+
+  Args:
+    call_or_put: Array of 1 for call, -1 for put.
+    K: Array of strike prices.
+    T: Array of times to maturity.
+    quantity: Array of position sizes.
+    long_short: Array of 1 for long, -1 for short.
+    S: Current stock price.
+    r: Risk-free interest rate.
+    sigma: Volatility of the underlying asset.
+
+  Returns:
+    A dict of arrays with the position level 'price', 'delta', 'vega' and 'gamma'.
+  """
+  notional = long_short * quantity
+  valuation = black_scholes_all(call_or_put, S, K, r, sigma, T)
+  return {metric: notional * value for metric, value in valuation.items()}
+
+
+def scenario_pnl(call_or_put, K, T, quantity, long_short, S, r, sigma, spot_moves, vol_moves):
+  """
+  Reprices a batch of option positions over a full spot/vol scenario grid.
+
+  Positions, spot moves and vol moves are broadcast against each other,
+  so the whole grid is valued with a single call to black_scholes_price.
+
+  Args:
+    call_or_put: Array of 1 for call, -1 for put.
+    K: Array of strike prices.
+    T: Array of times to maturity.
+    quantity: Array of position sizes.
+    long_short: Array of 1 for long, -1 for short.
+    S: Current stock price, a scalar or an array with one value per position.
+    r: Risk-free interest rate, a scalar or an array with one value per position.
+    sigma: Volatility of the underlying asset, a scalar or an array with one value per position.
+    spot_moves: Relative spot shifts of the grid, e.g. -0.05 for a 5% fall.
+    vol_moves: Relative vol shifts of the grid.
+
+  Returns:
+    An array of shape (positions, spot moves, vol moves) with the PnL of each position.
+  """
+  call_or_put, K, T = (np.asarray(x)[:, None, None] for x in (call_or_put, K, T))
+  notional = (np.asarray(long_short) * np.asarray(quantity))[:, None, None]
+  # market inputs are either scalars or one value per position
+  S, r, sigma = (np.asarray(x, dtype=float)[..., None, None] for x in (S, r, sigma))
+  new_spot = S * (1 + np.asarray(spot_moves, dtype=float))[None, :, None]
+  new_vol = sigma * (1 + np.asarray(vol_moves, dtype=float))[None, None, :]
+
+  original_price = black_scholes_price(call_or_put, S, K, r, sigma, T)
+  new_price = black_scholes_price(call_or_put, new_spot, K, r, new_vol, T)
+  return notional * (new_price - original_price)
+
+
+def value_positions(positions:pd.DataFrame, S, r, sigma, spot_moves, vol_moves):
+  """
+  Computes the Greeks and scenario PnL of option positions.
+
+  Args:
+    positions: Frame with CallOrPut, Strike, Tenor, Quantity and LongShort columns.
+    S: Current stock price, a scalar or an array with one value per position.
+    r: Risk-free interest rate, a scalar or an array with one value per position.
+    sigma: Volatility of the underlying asset, a scalar or an array with one value per position.
+    spot_moves: Spot moves of the scenario grid.
+    vol_moves: Vol moves of the scenario grid.
+
+  Returns:
+    A tuple of the (positions, 3) DELTA, VEGA, GAMMA array and the (positions, spot, vol) PnL array.
+  """
+  call_or_puts = positions['CallOrPut'].to_numpy()
+  strikes = positions['Strike'].to_numpy(dtype=float)
+  tenors = positions['Tenor'].to_numpy(dtype=float)
+  quantities = positions['Quantity'].to_numpy(dtype=float)
+  long_shorts = positions['LongShort'].to_numpy()
+
+  valuation = price_positions(call_or_puts, strikes, tenors, quantities, long_shorts, S, r, sigma)
+  greeks = np.column_stack([valuation['delta'], valuation['vega'], valuation['gamma']])
+  pnl = scenario_pnl(call_or_puts, strikes, tenors, quantities, long_shorts, S, r, sigma, spot_moves, vol_moves)
+  return greeks, pnl
+
+
+# Assuming some constant values for S, r, sigma
+SPOT = 1
+RATE = 0.05
+VOL = 0.2
+
+# define spot vol grid
+SPOT_MOVES = [-0.99, -0.25, -0.15, -0.05, 0, 0.05, 0.15, 0.25]
+VOL_MOVES = [-0.1, -0.05, -0.02, 0, 0.02, 0.05, 0.1]
+
+DEFAULT_ASSETS = [
+    {'Asset': 'AAPL', 'Sector': 'Technology', 'SubSector': 'Consumer Electronics', 'Desk': 'Equity'},
+    {'Asset': 'MSFT', 'Sector': 'Technology', 'SubSector': 'Software', 'Desk': 'Equity'},
+    {'Asset': 'GOOG', 'Sector': 'Technology', 'SubSector': 'Internet', 'Desk': 'Equity'},
+    {'Asset': 'AMZN', 'Sector': 'Consumer Discretionary', 'SubSector': 'E-commerce', 'Desk': 'Equity'},
+    {'Asset': 'TSLA', 'Sector': 'Consumer Discretionary', 'SubSector': 'Automobiles', 'Desk': 'Equity'},
+    {'Asset': 'NVDA', 'Sector': 'Semi Conductor', 'SubSector': 'Semiconductors', 'Desk': 'Equity'},
+    {'Asset': 'ASML', 'Sector': 'Semi Conductor', 'SubSector': 'Semiconductors', 'Desk': 'Equity'},
+    {'Asset': 'INTC', 'Sector': 'Semi Conductor', 'SubSector': 'Semiconductors', 'Desk': 'Equity'},
+    {'Asset': 'QCOM', 'Sector': 'Semi Conductor', 'SubSector': 'Semiconductors', 'Desk': 'Equity'},
+    {'Asset': 'AMD', 'Sector': 'Semi Conductor', 'SubSector': 'Semiconductors', 'Desk': 'Equity'},
+    {'Asset': 'JNJ', 'Sector': 'Healthcare', 'SubSector': 'Pharmaceuticals', 'Desk': 'Equity'},
+    {'Asset': 'V', 'Sector': 'Financials', 'SubSector': 'Payment Processing', 'Desk': 'Equity'},
+    {'Asset': 'MA', 'Sector': 'Financials', 'SubSector': 'Payment Processing', 'Desk': 'Equity'},
+    {'Asset': 'PG', 'Sector': 'Consumer Staples', 'SubSector': 'Household Products', 'Desk': 'Equity'},
+    {'Asset': 'UNH', 'Sector': 'Healthcare', 'SubSector': 'Managed Care', 'Desk': 'Equity'},
+    {'Asset': 'HD', 'Sector': 'Consumer Discretionary', 'SubSector': 'Home Improvement', 'Desk': 'Equity'},
+    {'Asset': 'BAC', 'Sector': 'Financials', 'SubSector': 'Banks', 'Desk': 'Equity'},
+    {'Asset': 'CRM', 'Sector': 'Technology', 'SubSector': 'Software', 'Desk': 'Equity'},
+    {'Asset': 'PYPL', 'Sector': 'Technology', 'SubSector': 'Financial Technology', 'Desk': 'Equity'},
+    {'Asset': 'ADBE', 'Sector': 'Technology', 'SubSector': 'Software', 'Desk': 'Equity'}
+]
+
+GREEKS = ['DELTA', 'VEGA', 'GAMMA']
+METRICS = GREEKS + ['SpotVol']
+
+
+def build_position_names(assets, call_or_puts, strikes, tenors):
+  """
+  Builds the display name of each option position, e.g. 'AAPL Call 1.25 0.5Y'.
+
+  Args:
+    assets: Array of asset names.
+    call_or_puts: Array of 1 for call, -1 for put.
+    strikes: Array of strike prices.
+    tenors: Array of times to maturity.
+
+  Returns:
+    An object array of position names.
+  """
+  names = [asset + ' ' + ('Call' if call_or_put == 1 else 'Put') + ' ' + str(strike) + ' ' + str(tenor) + 'Y'
+           for asset, call_or_put, strike, tenor
+           in zip(assets, call_or_puts, np.round(strikes, 2).tolist(), np.round(tenors, 2).tolist())]
+  return np.array(names, dtype=object)
+
+
+@dataclass
+class NormalizedInventory:
+  """
+  Risk inventory split into a position dimension table and dense risk arrays.
+
+  Row i of greeks and scenarios belongs to row i of positions. Each asset has
+  its option positions followed by its delta hedge, whose VEGA and GAMMA are
+  NaN. Summing a Greek reads the small greeks matrix instead of scanning the
+  scenario rows of the long format.
+  """
+  positions: pd.DataFrame
+  greeks: np.ndarray
+  scenarios: np.ndarray
+  spot_moves: np.ndarray
+  vol_moves: np.ndarray
+
+  def greeks_frame(self) -> pd.DataFrame:
+    """
+    Returns the position dimensions with one column per Greek.
+    """
+    df = self.positions[['Position', 'Asset', 'Sector', 'SubSector', 'Desk', 'Type', 'Strike', 'Tenor']].copy()
+    for i, greek in enumerate(GREEKS):
+      df[greek] = self.greeks[:, i]
+    return df
+
+  def to_long(self, compact:bool = False) -> pd.DataFrame:
+    """
+    Rebuilds the long format inventory produced by initialize_risk_data.
+
+    Every column is preallocated for its final length and filled with block
+    writes, so the frame is created once and build time stays linear in the
+    number of rows. The string and grid columns are first laid out as integer
+    codes. The compact layout keeps them that way as categoricals, with
+    float32 risk values, instead of expanding them to object strings and float64.
+
+    Args:
+      compact: Use the categorical/float32 layout.
+
+    Returns:
+      The long format risk inventory frame.
+    """
+    num_positions = len(self.positions)
+    grid_spot = np.repeat(np.arange(len(self.spot_moves)), len(self.vol_moves))
+    grid_vol = np.tile(np.arange(len(self.vol_moves)), len(self.spot_moves))
+    grid_size = len(grid_spot)
+
+    # Row offsets of each position block: its Greek rows followed by the spot/vol grid
+    has_greek = ~np.isnan(self.greeks)
+    greek_counts = has_greek.sum(axis=1)
+    block_start = np.concatenate([[0], np.cumsum(greek_counts + grid_size)[:-1]])
+    greek_position, greek_index = np.nonzero(has_greek)
+    greek_rows = block_start[greek_position] + (np.cumsum(has_greek, axis=1) - 1)[greek_position, greek_index]
+    grid_rows = ((block_start + greek_counts)[:, None] + np.arange(grid_size)).ravel()
+    num_rows = len(greek_rows) + len(grid_rows)
+
+    position_codes = np.empty(num_rows, dtype=np.int32)
+    position_codes[greek_rows] = greek_position
+    position_codes[grid_rows] = np.repeat(np.arange(num_positions), grid_size)
+
+    # Metric codes index into METRICS, grid codes into the moves with -1 for the Greek rows
+    metric_codes = np.empty(num_rows, dtype=np.int8)
+    metric_codes[greek_rows] = greek_index
+    metric_codes[grid_rows] = len(GREEKS)
+
+    spot_codes = np.empty(num_rows, dtype=np.int16)
+    spot_codes[greek_rows] = -1
+    spot_codes[grid_rows] = np.tile(grid_spot, num_positions)
+
+    vol_codes = np.empty(num_rows, dtype=np.int16)
+    vol_codes[greek_rows] = -1
+    vol_codes[grid_rows] = np.tile(grid_vol, num_positions)
+
+    risk_col = np.empty(num_rows, dtype=np.float32 if compact else float)
+    risk_col[greek_rows] = self.greeks[has_greek]
+    risk_col[grid_rows] = self.scenarios.reshape(num_positions, grid_size).ravel()
+
+    spot_moves = np.asarray(self.spot_moves, dtype=float)
+    vol_moves = np.asarray(self.vol_moves, dtype=float)
+    if compact:
+      columns = {'Position': None,
+                 'Metric': pd.Categorical.from_codes(metric_codes, METRICS),
+                 'RiskValue': risk_col,
+                 'SpotMove': pd.Categorical.from_codes(spot_codes, spot_moves),
+                 'VolMove': pd.Categorical.from_codes(vol_codes, vol_moves)}
+      for dimension in ['Position', 'Asset', 'Sector', 'SubSector', 'Desk']:
+        dimension_codes, dimension_categories = pd.factorize(self.positions[dimension])
+        columns[dimension] = pd.Categorical.from_codes(dimension_codes[position_codes], dimension_categories)
+    else:
+      # a trailing NaN turns the -1 grid codes of the Greek rows into NaN
+      columns = {'Position': None,
+                 'Metric': np.array(METRICS, dtype=object)[metric_codes],
+                 'RiskValue': risk_col,
+                 'SpotMove': np.append(spot_moves, np.nan)[spot_codes],
+                 'VolMove': np.append(vol_moves, np.nan)[vol_codes]}
+      for dimension in ['Position', 'Asset', 'Sector', 'SubSector', 'Desk']:
+        columns[dimension] = self.positions[dimension].to_numpy(dtype=object)[position_codes]
+    return pd.DataFrame(columns)
+
+
+def build_normalized_inventory(assets_in_portfolio, positions, greeks, pnl, spot_moves, vol_moves) -> NormalizedInventory:
+  """
+  Adds a delta hedge per asset to priced option positions and stores them normalized.
+
+  Args:
+    assets_in_portfolio: Frame with Asset, Sector, SubSector and Desk columns.
+    positions: Frame with AssetIndex, Position and option terms, ordered by AssetIndex.
+    greeks: Array of shape (positions, 3) with the position DELTA, VEGA and GAMMA.
+    pnl: Array of shape (positions, spot moves, vol moves) with the scenario PnL.
+    spot_moves: Spot moves of the scenario grid.
+    vol_moves: Vol moves of the scenario grid.
+
+  Returns:
+    The normalized inventory.
+  """
+  num_assets = len(assets_in_portfolio)
+  num_positions = len(positions)
+  asset_index = positions['AssetIndex'].to_numpy()
+  spot_moves = np.asarray(spot_moves, dtype=float)
+  vol_moves = np.asarray(vol_moves, dtype=float)
+
+  # Rows of each option and hedge in the position table
+  positions_per_asset = np.bincount(asset_index, minlength=num_assets)
+  asset_start = np.concatenate([[0], np.cumsum(positions_per_asset + 1)[:-1]])
+  first_position = np.concatenate([[0], np.cumsum(positions_per_asset)[:-1]])
+  option_rows = asset_start[asset_index] + np.arange(num_positions) - first_position[asset_index]
+  hedge_rows = asset_start + positions_per_asset
+  num_rows = num_positions + num_assets
+
+  # Enter a Delta hedge position per asset
+  hedge_delta = -1 * np.bincount(asset_index, weights=greeks[:, 0], minlength=num_assets)
+
+  def column(option_values, hedge_values, dtype):
+    values = np.empty(num_rows, dtype=dtype)
+    values[option_rows] = option_values
+    values[hedge_rows] = hedge_values
+    return values
+
+  call_or_puts = positions['CallOrPut'].to_numpy()
+  row_asset = column(asset_index, np.arange(num_assets), np.intp)
+  table = {'Position': column(positions['Position'].to_numpy(dtype=object), assets_in_portfolio['Asset'].to_numpy(dtype=object), object),
+           'AssetIndex': row_asset}
+  for dimension in ['Asset', 'Sector', 'SubSector', 'Desk']:
+    table[dimension] = assets_in_portfolio[dimension].to_numpy(dtype=object)[row_asset]
+  table['Type'] = column(np.where(call_or_puts == 1, 'Call', 'Put').astype(object), 'Hedge', object)
+  table['CallOrPut'] = column(call_or_puts, 0, np.int64)
+  table['Strike'] = column(positions['Strike'].to_numpy(), np.nan, float)
+  table['Tenor'] = column(positions['Tenor'].to_numpy(), np.nan, float)
+  table['Quantity'] = column(positions['Quantity'].to_numpy(), np.nan, float)
+  table['LongShort'] = column(positions['LongShort'].to_numpy(), 0, np.int64)
+
+  all_greeks = np.full((num_rows, len(GREEKS)), np.nan)
+  all_greeks[option_rows] = greeks
+  all_greeks[hedge_rows, 0] = hedge_delta
+
+  scenarios = np.empty((num_rows, len(spot_moves), len(vol_moves)))
+  scenarios[option_rows] = pnl
+  scenarios[hedge_rows] = hedge_delta[:, None, None] * spot_moves[None, :, None]
+
+  return NormalizedInventory(pd.DataFrame(table), all_greeks, scenarios, spot_moves, vol_moves)
+
+
+def concat_inventory_frames(frames) -> pd.DataFrame:
+  """
+  Concatenates inventory frames built for separate blocks of assets.
+
+  Categorical columns are merged with union_categoricals, since pd.concat
+  falls back to object columns when the categories differ between blocks.
+
+  Args:
+    frames: List of inventory frames with the same columns.
+
+  Returns:
+    The combined inventory frame.
+  """
+  columns = {}
+  for column in frames[0].columns:
+    if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+      columns[column] = union_categoricals([frame[column] for frame in frames])
+    else:
+      columns[column] = np.concatenate([frame[column].to_numpy() for frame in frames])
+  return pd.DataFrame(columns)
+
+
+def concat_normalized_inventories(inventories) -> NormalizedInventory:
+  """
+  Concatenates normalized inventories built for consecutive blocks of assets.
+
+  Args:
+    inventories: List of normalized inventories on the same scenario grid.
+
+  Returns:
+    The combined normalized inventory.
+  """
+  tables = []
+  asset_offset = 0
+  for inventory in inventories:
+    table = inventory.positions.copy()
+    table['AssetIndex'] += asset_offset
+    asset_offset += (table['Type'] == 'Hedge').sum()
+    tables.append(table)
+  return NormalizedInventory(pd.concat(tables, ignore_index=True),
+                             np.concatenate([inventory.greeks for inventory in inventories]),
+                             np.concatenate([inventory.scenarios for inventory in inventories]),
+                             inventories[0].spot_moves,
+                             inventories[0].vol_moves)
+
+
+def bytes_per_row(df:pd.DataFrame) -> float:
+  """
+  Measures the memory footprint of a frame, including the Python strings of object columns.
+
+  Args:
+    df: Frame to measure.
+
+  Returns:
+    The average number of bytes per row.
+  """
+  return df.memory_usage(index=False, deep=True).sum() / max(len(df), 1)
+
+
+def generate_positions(assets_in_portfolio:pd.DataFrame, rng:np.random.Generator) -> pd.DataFrame:
+  """
+  Randomly generates the option positions of every asset.
+
+  All randoms are drawn in bulk, one call per attribute across the whole
+  portfolio, so the positions depend only on the generator state.
+
+  Args:
+    assets_in_portfolio: Frame with Asset, Sector, SubSector and Desk columns.
+    rng: numpy random Generator to draw from.
+
+  Returns:
+    A frame with one row per position, ordered by AssetIndex.
+  """
+  # randomly determine the number of positions
+  num_positions = np.abs(rng.normal(loc=20, scale=30, size=len(assets_in_portfolio))).astype(int)
+  total_positions = int(num_positions.sum())
+
+  # Randomly generate options
+  # Position Size: Normally distributed with mean 100 and standard deviation 20
+  quantities = rng.normal(loc=10e6, scale=20, size=total_positions)
+
+  # Call or Put: Either 1 or -1
+  call_or_puts = rng.choice([-1, 1], size=total_positions)
+
+  # Long or short: Either 1 or -1
+  long_shorts = rng.choice([-1, 1], size=total_positions)
+
+  # Strike of the options: Randomly distributed with mean 1, range 0.5 to 2
+  strikes = rng.uniform(low=0.5, high=2, size=total_positions)
+
+  # Tenors of the options: All positive, centered around 0.5, no more than 3
+  tenors = rng.triangular(left=0, mode=0.5, right=3, size=total_positions)
+
+  asset_index = np.repeat(np.arange(len(assets_in_portfolio)), num_positions)
+  return pd.DataFrame({'AssetIndex': asset_index,
+                       'Position': build_position_names(assets_in_portfolio['Asset'].to_numpy()[asset_index],
+                                                        call_or_puts, strikes, tenors),
+                       'CallOrPut': call_or_puts,
+                       'Strike': strikes,
+                       'Tenor': tenors,
+                       'Quantity': quantities,
+                       'LongShort': long_shorts})
+
+
+def build_risk_inventory(assets_in_portfolio:pd.DataFrame, positions:pd.DataFrame, spot_moves, vol_moves,
+                         compact:bool = False, normalized:bool = False):
+  """
+  Prices and lays out the risk inventory of a block of assets.
+
+  Args:
+    assets_in_portfolio: Frame with Asset, Sector, SubSector and Desk columns.
+    positions: Positions of the assets, with AssetIndex relative to assets_in_portfolio.
+    spot_moves: Spot moves of the scenario grid.
+    vol_moves: Vol moves of the scenario grid.
+    compact: Use the categorical/float32 layout.
+    normalized: Return a NormalizedInventory instead of the long format frame.
+
+  Returns:
+    The risk inventory of the assets.
+  """
+  assets_in_portfolio = assets_in_portfolio.reset_index(drop=True)
+  positions = positions.reset_index(drop=True)
+
+  greeks, pnl = value_positions(positions, SPOT, RATE, VOL, spot_moves, vol_moves)
+
+  inventory = build_normalized_inventory(assets_in_portfolio, positions, greeks, pnl, spot_moves, vol_moves)
+  return inventory if normalized else inventory.to_long(compact)
+
+
+def initialize_risk_data(assets_in_portfolio:pd.DataFrame = None, spot_moves = None, vol_moves = None,
+                         seed = None, workers:int = None, chunk_size:int = None, compact:bool = False,
+                         normalized:bool = False):
+  """
+  Generates the risk inventory of the portfolio.
+
+  Positions are drawn up front from a single generator, so the same seed
+  and inputs always give the same frame. Assets are priced independently,
+  so with more than one worker they are split into chunks and built across
+  a process pool; the result does not depend on the worker count.
+
+  Args:
+    assets_in_portfolio: Frame with Asset, Sector, SubSector and Desk columns. Defaults to DEFAULT_ASSETS.
+    spot_moves: Spot moves of the scenario grid. Defaults to SPOT_MOVES.
+    vol_moves: Vol moves of the scenario grid. Defaults to VOL_MOVES.
+    seed: Seed or numpy random Generator of the random positions. None draws fresh entropy.
+    workers: Number of worker processes. None or 1 builds in the current process.
+    chunk_size: Number of assets sent to a worker at a time. Defaults to about four chunks per worker.
+    compact: Use categoricals for the string and grid columns and float32 risk values.
+    normalized: Return a NormalizedInventory of positions, Greeks and scenario cube
+      instead of the long format frame. Its to_long() rebuilds the long format.
+
+  Returns:
+    The risk inventory frame, or the NormalizedInventory.
+  """
+  # Denser grids, e.g. 50x50 for stress reports, can be passed in instead of the default ladder
+  spot_moves = SPOT_MOVES if spot_moves is None else list(spot_moves)
+  vol_moves = VOL_MOVES if vol_moves is None else list(vol_moves)
+
+  if assets_in_portfolio is None:
+    assets_in_portfolio = pd.DataFrame(DEFAULT_ASSETS, columns=['Asset', 'Sector', 'SubSector', 'Desk'])
+  assets_in_portfolio = assets_in_portfolio.reset_index(drop=True)
+
+  print(f"Generating risk inventory for {len(assets_in_portfolio)} assets")
+  positions = generate_positions(assets_in_portfolio, np.random.default_rng(seed))
+
+  if workers is None or workers <= 1:
+    return build_risk_inventory(assets_in_portfolio, positions, spot_moves, vol_moves, compact, normalized)
+
+  if chunk_size is None:
+    chunk_size = max(1, math.ceil(len(assets_in_portfolio) / (workers * 4)))
+  starts = range(0, len(assets_in_portfolio), chunk_size)
+  asset_index = positions['AssetIndex'].to_numpy()
+  position_bounds = np.searchsorted(asset_index, [[start, start + chunk_size] for start in starts])
+
+  position_chunks = []
+  for start, (first, last) in zip(starts, position_bounds):
+    chunk = positions.iloc[first:last].copy()
+    chunk['AssetIndex'] -= start
+    position_chunks.append(chunk)
+
+  with ProcessPoolExecutor(max_workers=workers) as executor:
+    frames = list(executor.map(build_risk_inventory,
+                               [assets_in_portfolio.iloc[start:start + chunk_size] for start in starts],
+                               position_chunks,
+                               itertools.repeat(spot_moves),
+                               itertools.repeat(vol_moves),
+                               itertools.repeat(compact),
+                               itertools.repeat(normalized)))
+  return concat_normalized_inventories(frames) if normalized else concat_inventory_frames(frames)
 
 #riskInventory
 
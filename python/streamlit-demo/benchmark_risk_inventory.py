@@ -0,0 +1,139 @@
+import contextlib
+import io
+import sys
+import time
+import numpy as np
+import pandas as pd
+import GenerateRiskInventory as riskData
+
+# Same market inputs as the inventory generator
+S = riskData.SPOT
+r = riskData.RATE
+sigma = riskData.VOL
+
+
+def random_positions(num_positions:int, seed:int = 0):
+    rng = np.random.default_rng(seed)
+    return {
+        "call_or_put": rng.choice([-1, 1], size=num_positions),
+        "K": rng.uniform(low=0.5, high=2, size=num_positions),
+        "T": rng.triangular(left=0, mode=0.5, right=3, size=num_positions),
+        "quantity": rng.normal(loc=10e6, scale=20, size=num_positions),
+        "long_short": rng.choice([-1, 1], size=num_positions),
+    }
+
+
+def scalar_valuation(positions:dict):
+    valuation = {"price": [], "delta": [], "vega": [], "gamma": []}
+    for cp, K, T, q, ls in zip(*positions.values()):
+        valuation["price"].append(ls * q * riskData.black_scholes_price(cp, S, K, r, sigma, T))
+        valuation["delta"].append(ls * q * riskData.black_scholes_delta(cp, S, K, r, sigma, T))
+        valuation["vega"].append(ls * q * riskData.black_scholes_vega(S, K, r, sigma, T))
+        valuation["gamma"].append(ls * q * riskData.black_scholes_gamma(S, K, r, sigma, T))
+    return {metric: np.array(values) for metric, values in valuation.items()}
+
+
+def benchmark_batch_pricing(num_positions:int = 10000):
+    positions = random_positions(num_positions)
+
+    start = time.perf_counter()
+    scalar_valuation(positions)
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    riskData.price_positions(**positions, S=S, r=r, sigma=sigma)
+    batch_time = time.perf_counter() - start
+
+    print(f"{num_positions} positions: scalar {scalar_time:.3f}s, batched {batch_time:.4f}s ({scalar_time / batch_time:.0f}x)")
+
+
+def benchmark_black_scholes_all(num_calls:int = 20000):
+    """Micro-benchmark of the combined kernel against the four separate black_scholes_* functions."""
+    positions = random_positions(num_calls)
+    args = list(zip(positions["call_or_put"], positions["K"], positions["T"]))
+
+    start = time.perf_counter()
+    for cp, K, T in args:
+        riskData.black_scholes_price(cp, S, K, r, sigma, T)
+        riskData.black_scholes_delta(cp, S, K, r, sigma, T)
+        riskData.black_scholes_vega(S, K, r, sigma, T)
+        riskData.black_scholes_gamma(S, K, r, sigma, T)
+    separate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for cp, K, T in args:
+        riskData.black_scholes_all(cp, S, K, r, sigma, T)
+    combined_time = time.perf_counter() - start
+    print(f"{num_calls} scalar valuations: separate {separate_time:.3f}s, black_scholes_all {combined_time:.3f}s ({separate_time / combined_time:.1f}x)")
+
+    cp, K, T = positions["call_or_put"], positions["K"], positions["T"]
+    start = time.perf_counter()
+    for _ in range(100):
+        riskData.black_scholes_price(cp, S, K, r, sigma, T)
+        riskData.black_scholes_delta(cp, S, K, r, sigma, T)
+        riskData.black_scholes_vega(S, K, r, sigma, T)
+        riskData.black_scholes_gamma(S, K, r, sigma, T)
+    separate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(100):
+        riskData.black_scholes_all(cp, S, K, r, sigma, T)
+    combined_time = time.perf_counter() - start
+    print(f"100 x {num_calls} array valuations: separate {separate_time:.3f}s, black_scholes_all {combined_time:.3f}s ({separate_time / combined_time:.1f}x)")
+
+
+def synthetic_assets(num_assets:int) -> pd.DataFrame:
+    """Cycles through the default portfolio, suffixing names to keep the assets unique."""
+    rows = []
+    for i in range(num_assets):
+        row = dict(riskData.DEFAULT_ASSETS[i % len(riskData.DEFAULT_ASSETS)])
+        row["Asset"] = f"{row['Asset']}{i // len(riskData.DEFAULT_ASSETS)}"
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def benchmark_inventory_scaling(asset_counts=(20, 200, 2000, 20000)):
+    """Times the full inventory build; time per row should stay flat as the book grows."""
+    for num_assets in asset_counts:
+        assets = synthetic_assets(num_assets)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            inventory = riskData.initialize_risk_data(assets, seed=0)
+        elapsed = time.perf_counter() - start
+        print(f"{num_assets:>6} assets: {len(inventory):>10} rows in {elapsed:8.3f}s ({elapsed / len(inventory) * 1e9:6.0f} ns/row)")
+        del inventory
+
+
+def benchmark_parallel_inventory(num_assets:int = 2000, worker_counts=(1, 2, 4, 8)):
+    """Times the process pool build; the frames must not depend on the worker count."""
+    assets = synthetic_assets(num_assets)
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            inventory = riskData.initialize_risk_data(assets, seed=0, workers=workers)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = inventory
+        assert inventory.equals(baseline), f"inventory differs with {workers} workers"
+        print(f"{num_assets} assets with {workers} workers: {elapsed:.3f}s")
+
+
+def report_inventory_memory(num_assets:int = 200):
+    """Compares the bytes per row of the standard and compact inventory layouts."""
+    assets = synthetic_assets(num_assets)
+    with contextlib.redirect_stdout(io.StringIO()):
+        standard = riskData.initialize_risk_data(assets, seed=0)
+        compact = riskData.initialize_risk_data(assets, seed=0, compact=True)
+    before = riskData.bytes_per_row(standard)
+    after = riskData.bytes_per_row(compact)
+    print(f"{len(standard)} rows: {before:.1f} bytes/row standard, {after:.1f} bytes/row compact ({before / after:.0f}x smaller)")
+
+
+if __name__ == "__main__":
+    benchmark_batch_pricing()
+    benchmark_black_scholes_all()
+    max_assets = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    benchmark_inventory_scaling([n for n in (20, 200, 2000, 20000) if n <= max_assets])
+    benchmark_parallel_inventory(min(2000, max_assets))
+    report_inventory_memory(min(200, max_assets))
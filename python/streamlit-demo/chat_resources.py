@@ -0,0 +1,48 @@
+# Process-wide resources and chat helpers shared by the main.py and main2.py Streamlit scripts
+import os
+import streamlit as st
+import data_provider as dp
+from inventory_refresher import REFRESH_SECONDS, InventoryRefresher, PublishedSnapshots, build_snapshot, period_seed
+from query_translator import TranslationService
+
+# "local" builds the inventory in this process; "consumer" attaches read-only to the inventory
+# a separate `python inventory_refresher.py` producer publishes for every worker on the host
+RISK_INVENTORY_MODE = os.environ.get("RISK_INVENTORY_MODE", "local")
+ATTACH_POLL_SECONDS = 30
+NOT_UNDERSTOOD = "Sorry, I could not understand that question, please rephrase it or try again"
+INVENTORY_REFRESHED = "The risk inventory has been refreshed since this answer, please ask again"
+
+# inventories are built off the script run: the first as soon as the process serves a page,
+# then a new version every REFRESH_SECONDS, swapped in whole
+@st.cache_resource
+def create_refresher():
+    if RISK_INVENTORY_MODE == "consumer":
+        return InventoryRefresher(PublishedSnapshots(), ATTACH_POLL_SECONDS).start()
+    return InventoryRefresher(lambda: build_snapshot(period_seed()), REFRESH_SECONDS).start()
+
+# index and prompt parser of the latest inventory version
+def current_snapshot():
+    return create_refresher().current()
+
+# one event loop, connection pool and prompt cache shared by every session; when the model is
+# slow or down the prompt gets a best-effort local reading instead (runs on the translator's loop thread)
+@st.cache_resource
+def create_translator():
+    refresher = create_refresher()
+    return TranslationService(fallback=lambda prompt: refresher.current().parser.parse(prompt, strict=False))
+
+# template prompts are parsed locally, only the rest pay for the model round-trip
+def translate_prompt(prompt:str) -> dict:
+    return current_snapshot().parser.parse(prompt) or create_translator().translate(prompt)
+
+# Chart frames are aggregated and capped server side and cached per answer
+def show_chart(handle):
+    frames = dp.chart_data(handle, current_snapshot().index) if handle is not None else None
+    if frames is None:
+        st.markdown(INVENTORY_REFRESHED)
+        return
+    if frames["greeks"] is not None:
+        st.bar_chart(frames["greeks"])
+    if frames["spot_vol"] is not None:
+        st.caption("SpotVol ladder by spot move")
+        st.line_chart(frames["spot_vol"])
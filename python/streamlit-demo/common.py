@@ -5,11 +5,18 @@ import pandas as pd
 class Query:
     prompt: str
 
+@dataclass(frozen=True)
+class ResultHandle:
+    # normalized query as canonical JSON and the inventory version it was answered on
+    query: str
+    version: object
+
 @dataclass
 class QueryResponse:
     content:str
     source:str = None
     df:pd.DataFrame = None
+    handle:ResultHandle = None
 
     def create_response(self):
-        return {"content":self.content,"source":self.source}
\ No newline at end of file
+        return {"content":self.content,"source":self.source,"handle":self.handle}
\ No newline at end of file
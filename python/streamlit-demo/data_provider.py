@@ -1,19 +1,243 @@
+import dataclasses
+import json
+import numpy as np
 import pandas as pd
-from common import Query, QueryResponse
+from common import Query, QueryResponse, ResultHandle
+from query_cache import QUERY_CACHE, QueryCache
+from risk_index import DIMENSIONS, INDEXED_FIELDS, RiskIndex
+
+METRIC_LABELS = {"DELTA": "Delta", "VEGA": "Vega", "GAMMA": "Gamma", "SpotVol": "SpotVol"}
+# upper bounds on what a chart sends to the browser, whatever the size of the inventory
+CHART_MAX_BARS = 50
+CHART_MAX_POINTS = 2000
+# grid coordinates of the SpotVol rows; filters on them do not apply to the Greeks, whose rows have none
+SCENARIO_FIELDS = ("SpotMove", "VolMove")
 
 #pass chat  text to GPT to formulate response
 def create_query(input_text:str):
     return {"start_date": "20231031", "metric": "VEGA", "filters": [{"filter_field": "Asset", "filter_value": "AAPL"}]}
 
-def query_risk(query:Query, df:pd.DataFrame):
-    query = create_query(query.prompt)
-    filtered_df = df[df[query["filters"][0]["filter_field"]]==query["filters"][0]["filter_value"]]
-    riskValue = filtered_df[filtered_df["Metric"]==query["metric"]]["RiskValue"].sum()
-    return QueryResponse(content=f"Your Vega risk to AAPL is {riskValue}", source="RiskStore")
-
-def query_risk2(query:Query, df:pd.DataFrame):
-    query = create_query(query.prompt)
-    filtered_df = df[df[query["filters"][0]["filter_field"]]==query["filters"][0]["filter_value"]]
-    filtered_df = filtered_df[filtered_df["Metric"]==query["metric"]]
-    risk_value = filtered_df["RiskValue"].sum()
-    return QueryResponse(content=f"Your Vega risk to AAPL is {risk_value}", source="RiskStore", df=filtered_df)
\ No newline at end of file
+def normalize_query(query:dict) -> dict:
+    """
+    Brings a query into its canonical form.
+
+    Accepts "metric" or "metrics", filters with an optional "operator" (==, in, between; default ==),
+    an optional "group_by" list of fields, and optional "spot_moves"/"vol_moves" scenario slices,
+    which become in filters on SpotMove/VolMove and only restrict the SpotVol metric.
+    """
+    metrics = query.get("metrics") or [query["metric"]]
+    filters = [{"filter_field": f["filter_field"], "operator": f.get("operator", "=="), "filter_value": f["filter_value"]}
+               for f in query.get("filters", [])]
+    for field, moves in (("SpotMove", query.get("spot_moves")), ("VolMove", query.get("vol_moves"))):
+        if moves is not None:
+            filters.append({"filter_field": field, "operator": "in", "filter_value": list(moves)})
+    for f in filters:
+        if f["operator"] not in ("==", "in", "between"):
+            raise ValueError(f"unsupported filter operator {f['operator']}")
+    return {"start_date": query.get("start_date"), "metrics": list(metrics), "filters": filters,
+            "group_by": list(query.get("group_by", []))}
+
+def filter_mask(values:pd.Series, operator:str, value) -> np.ndarray:
+    if operator == "==":
+        mask = values == value
+    elif operator == "in":
+        mask = values.isin(list(value))
+    else:
+        low, high = value
+        mask = (values >= low) & (values <= high)
+    return mask.fillna(False).to_numpy(dtype=bool)
+
+def metric_filters(metric:str, filters:list) -> list:
+    """The filters that apply to a metric: scenario filters only restrict SpotVol."""
+    if metric == "SpotVol":
+        return filters
+    return [f for f in filters if f["filter_field"] not in SCENARIO_FIELDS]
+
+def select_rows(index:RiskIndex, metric:str, filters:list) -> np.ndarray:
+    """
+    Row positions of a metric that pass every filter.
+
+    The most selective filter on an indexed field picks the candidate rows through the index,
+    the remaining filters are then checked on those candidates only, most selective first.
+    """
+    filters = metric_filters(metric, filters)
+    indexed = [f for f in filters if (metric, f["filter_field"]) in index.values]
+    others = [f for f in filters if (metric, f["filter_field"]) not in index.values]
+    indexed.sort(key=lambda f: index.estimate(metric, f["filter_field"], f["operator"], f["filter_value"]))
+
+    if indexed:
+        first = indexed.pop(0)
+        rows = index.lookup(metric, first["filter_field"], first["operator"], first["filter_value"])
+    else:
+        rows = index.metric_rows.get(metric, np.empty(0, dtype=np.intp))
+    for f in indexed + others:
+        if len(rows) == 0:
+            break
+        if f["filter_field"] not in index.df.columns:
+            raise KeyError(f"unknown filter field {f['filter_field']}")
+        rows = rows[filter_mask(index.df[f["filter_field"]].take(rows), f["operator"], f["filter_value"])]
+    return rows
+
+def matching_rows(query:dict, index:RiskIndex) -> np.ndarray:
+    """Sorted inventory row positions matching the metrics and filters of a normalized query."""
+    return np.sort(np.concatenate([select_rows(index, metric, query["filters"]) for metric in query["metrics"]]))
+
+def group_totals(query:dict, df:pd.DataFrame) -> pd.Series:
+    return df.groupby(["Metric"] + query["group_by"], sort=False, observed=True)["RiskValue"].sum()
+
+def run_query(query:dict, index:RiskIndex, with_rows:bool = True):
+    """
+    Evaluates a normalized query against the index.
+
+    Returns:
+        The summed RiskValue per metric (and group_by fields) as a Series, and the matching
+        inventory rows, or None for the rows when with_rows is False.
+    """
+    filters = {metric: metric_filters(metric, query["filters"]) for metric in query["metrics"]}
+    simple = (not query["group_by"]
+              and all(len(fs) <= 1 and all(f["operator"] == "==" and f["filter_field"] in INDEXED_FIELDS for f in fs)
+                      for fs in filters.values()))
+    if simple and not with_rows:
+        # a single equality filter per metric, or none, is answered straight from the pre-aggregated sums
+        keys = {metric: (fs[0]["filter_field"], fs[0]["filter_value"]) if fs else () for metric, fs in filters.items()}
+        return pd.Series({metric: index.total(metric, *key) for metric, key in keys.items()}, name="RiskValue"), None
+
+    filtered_df = index.df.take(matching_rows(query, index))
+    return group_totals(query, filtered_df), filtered_df
+
+def page_frame(df:pd.DataFrame, page:int = 0, page_size:int = 100, sort_by:str = None,
+               ascending:bool = True, columns:list = None):
+    """
+    One page of a result frame, sorted and projected before any row is copied.
+
+    Sorting orders row positions by the sort column alone and only the rows of the requested
+    page are taken, so the cost of serializing a page does not grow with the frame.
+
+    Returns:
+        The page as a frame, the total row count and the number of pages.
+    """
+    total_rows = len(df)
+    num_pages = max(1, -(-total_rows // page_size))
+    page = min(max(page, 0), num_pages - 1)
+    if sort_by is None:
+        positions = np.arange(page * page_size, min((page + 1) * page_size, total_rows))
+    else:
+        order = df[sort_by].reset_index(drop=True).sort_values(ascending=ascending, kind="stable", na_position="last").index
+        positions = order.to_numpy()[page * page_size:(page + 1) * page_size]
+    # project after sorting so the sort column does not have to be displayed
+    if columns:
+        df = df[list(columns)]
+    return df.take(positions), total_rows, num_pages
+
+def describe_filters(filters:list) -> str:
+    parts = []
+    for f in filters:
+        if f["operator"] == "in":
+            value = "/".join(str(v) for v in f["filter_value"])
+        elif f["operator"] == "between":
+            value = f"{f['filter_value'][0]} to {f['filter_value'][1]}"
+        else:
+            value = str(f["filter_value"])
+        # dimension values read on their own, other fields need their name for context
+        parts.append(value if f["filter_field"] in DIMENSIONS else f"{f['filter_field']} {value}")
+    return ", ".join(parts) if parts else "the portfolio"
+
+def describe_result(query:dict, totals:pd.Series) -> str:
+    lines = []
+    for metric in query["metrics"]:
+        label = METRIC_LABELS.get(metric, metric)
+        target = describe_filters(metric_filters(metric, query["filters"]))
+        if not query["group_by"]:
+            lines.append(f"Your {label} risk to {target} is {float(totals.get(metric, 0.0))}")
+            continue
+        lines.append(f"Your {label} risk to {target} by {', '.join(query['group_by'])}:")
+        if metric in totals.index.get_level_values(0):
+            for group, value in totals.loc[metric].items():
+                group = " / ".join(str(g) for g in group) if isinstance(group, tuple) else str(group)
+                lines.append(f"- {group}: {float(value)}")
+    return "\n".join(lines)
+
+def top_categories(table:pd.DataFrame, max_bars:int) -> pd.DataFrame:
+    """Keeps the max_bars - 1 largest categories by absolute value and sums the rest into Other."""
+    if len(table) <= max_bars:
+        return table
+    order = table.abs().sum(axis=1).sort_values(ascending=False).index
+    other = table.loc[order[max_bars - 1:]].sum().to_frame("Other").T
+    return pd.concat([table.loc[order[:max_bars - 1]], other])
+
+def decimate(table:pd.DataFrame, max_points:int) -> pd.DataFrame:
+    """Evenly spaced rows of a table, as many as fit in max_points values."""
+    keep = max(2, max_points // max(1, table.shape[1]))
+    if len(table) <= keep:
+        return table
+    return table.iloc[np.unique(np.linspace(0, len(table) - 1, keep).round().astype(int))]
+
+def chart_frames(query:dict, index:RiskIndex, max_bars:int = CHART_MAX_BARS, max_points:int = CHART_MAX_POINTS) -> dict:
+    """
+    Chart-ready aggregates of a normalized query.
+
+    Returns:
+        "greeks": the Greek metrics summed by the query's group_by fields (Asset when there are
+        none), one column per metric; "spot_vol": the SpotVol ladder, spot moves by vol moves.
+        Either is None when the query does not ask for it.
+    """
+    frames = {"greeks": None, "spot_vol": None}
+    greeks = [metric for metric in query["metrics"] if metric != "SpotVol"]
+    if greeks:
+        group_by = query["group_by"] or ["Asset"]
+        totals, _ = run_query({**query, "metrics": greeks, "group_by": group_by}, index, with_rows=False)
+        table = totals.astype(float).unstack("Metric").reindex(columns=greeks).fillna(0.0)
+        if isinstance(table.index, pd.MultiIndex):
+            table.index = [" / ".join(str(v) for v in group) for group in table.index]
+        table.columns = [METRIC_LABELS.get(metric, metric) for metric in table.columns]
+        frames["greeks"] = top_categories(table, max_bars)
+    if "SpotVol" in query["metrics"]:
+        totals, _ = run_query({**query, "metrics": ["SpotVol"], "group_by": ["SpotMove", "VolMove"]}, index, with_rows=False)
+        if len(totals):
+            ladder = totals.astype(float).loc["SpotVol"].unstack("VolMove").sort_index().sort_index(axis=1)
+            ladder.index = pd.Index(ladder.index.astype(float), name="SpotMove")
+            ladder.columns = [f"Vol {float(move):+.0%}" for move in ladder.columns]
+            frames["spot_vol"] = decimate(ladder, max_points)
+    return frames
+
+def make_handle(query:dict, index:RiskIndex) -> ResultHandle:
+    return ResultHandle(json.dumps(query, sort_keys=True, default=str), index.version)
+
+def query_risk(query:Query, index:RiskIndex, cache:QueryCache = QUERY_CACHE, translate = create_query):
+    query = normalize_query(translate(query.prompt))
+    def compute():
+        totals, _ = run_query(query, index, with_rows=False)
+        return QueryResponse(content=describe_result(query, totals), source="RiskStore", handle=make_handle(query, index))
+    return cache.get_or_compute(query, index.version, compute, kind="summary")
+
+def rows_response(query:dict, index:RiskIndex, cache:QueryCache = QUERY_CACHE) -> QueryResponse:
+    """
+    Answer with the matching rows. The shared cache keeps the answer and the row positions only,
+    the frame is taken for each call so it belongs to the caller and is freed with it.
+    """
+    taken = {}
+    def compute():
+        rows = matching_rows(query, index)
+        taken["df"] = index.df.take(rows)
+        response = QueryResponse(content=describe_result(query, group_totals(query, taken["df"])), source="RiskStore",
+                                 handle=make_handle(query, index))
+        return response, rows
+    response, rows = cache.get_or_compute(query, index.version, compute, kind="rows")
+    df = taken["df"] if "df" in taken else index.df.take(rows)
+    return dataclasses.replace(response, df=df)
+
+def query_risk2(query:Query, index:RiskIndex, cache:QueryCache = QUERY_CACHE, translate = create_query):
+    return rows_response(normalize_query(translate(query.prompt)), index, cache)
+
+def result_frame(handle:ResultHandle, index:RiskIndex, cache:QueryCache = QUERY_CACHE):
+    """Rebuilds the rows behind a handle, or None once the inventory has moved to a new version."""
+    if handle.version != index.version:
+        return None
+    return rows_response(json.loads(handle.query), index, cache).df
+
+def chart_data(handle:ResultHandle, index:RiskIndex, cache:QueryCache = QUERY_CACHE):
+    """Chart frames for the answer behind a handle, cached per response; None once the inventory has moved on."""
+    if handle.version != index.version:
+        return None
+    query = json.loads(handle.query)
+    return cache.get_or_compute(query, index.version, lambda: chart_frames(query, index), kind="chart")
@@ -0,0 +1,102 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+import inventory_store
+from prompt_parser import PromptParser
+from risk_index import RiskIndex
+
+# base seed; each refresh period derives its own, so every worker and restart within a period
+# reuses the same persisted inventory
+RISK_DATA_SEED = 20231031
+REFRESH_SECONDS = int(os.environ.get("RISK_REFRESH_SECONDS", 3600))
+
+def period_seed(interval:float = REFRESH_SECONDS) -> int:
+    return RISK_DATA_SEED + int(time.time() // interval)
+
+@dataclass(frozen=True)
+class RiskSnapshot:
+    # everything derived from one inventory version, swapped in as a unit
+    index: RiskIndex
+    parser: PromptParser
+
+def build_snapshot(seed:int) -> RiskSnapshot:
+    index = RiskIndex(inventory_store.load_or_create_inventory(seed=seed))
+    # scheduled builds write a new file per period, keep the directory from growing without bound
+    inventory_store.prune_inventories()
+    return RiskSnapshot(index, PromptParser(index))
+
+class PublishedSnapshots:
+    """
+    Build function for consumer processes: attaches to the version the producer published last.
+
+    Returns the previous snapshot while the published version is unchanged, so polling often is cheap.
+    """
+
+    def __init__(self, directory:str = None):
+        self.directory = directory
+        self._snapshot = None
+
+    def __call__(self) -> RiskSnapshot:
+        if self._snapshot is None or self._snapshot.index.version != inventory_store.published_version(self.directory):
+            index = inventory_store.attach_inventory(self.directory)
+            self._snapshot = RiskSnapshot(index, PromptParser(index))
+        return self._snapshot
+
+class InventoryRefresher:
+    """
+    Builds inventory snapshots on a background thread and publishes the latest complete one.
+
+    The first build starts as soon as start() is called and a new one every `interval` seconds
+    after that. Publishing is a single reference assignment, so readers see either the old or
+    the new snapshot, never a partial one, and only the very first current() call can wait.
+    A failed rebuild is recorded in `error` and the previous snapshot stays in service.
+    """
+
+    def __init__(self, build, interval:float = 3600):
+        self.interval = interval
+        self.error = None
+        self.builds = 0
+        self._build = build
+        self._snapshot = None
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name="inventory-refresher", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def current(self, timeout:float = None):
+        """The latest snapshot, waiting for the first build if it has not finished yet."""
+        if not self._ready.wait(timeout):
+            raise TimeoutError("the first inventory build has not finished")
+        if self._snapshot is None:
+            raise RuntimeError("the first inventory build failed") from self.error
+        return self._snapshot
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self._snapshot = self._build()
+                self.builds += 1
+                self.error = None
+            except Exception as error:
+                self.error = error
+                traceback.print_exc()
+            # wake up waiters on the first outcome, a failure included
+            self._ready.set()
+            self._stopped.wait(self.interval)
+
+if __name__ == "__main__":
+    # producer for RISK_INVENTORY_MODE=consumer workers: publish now and every REFRESH_SECONDS
+    interval = float(sys.argv[1]) if len(sys.argv) > 1 else REFRESH_SECONDS
+    while True:
+        path = inventory_store.publish_inventory(seed=period_seed(interval))
+        inventory_store.prune_inventories()
+        print(f"Published {os.path.basename(path)}", flush=True)
+        time.sleep(interval)
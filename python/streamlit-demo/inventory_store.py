@@ -0,0 +1,145 @@
+import hashlib
+import json
+import numbers
+import os
+import tempfile
+import pandas as pd
+import pyarrow as pa
+import GenerateRiskInventory as riskData
+from risk_index import RiskIndex
+
+# bump when the layout of the inventory frame changes so stale files are not reused
+SCHEMA_VERSION = 1
+# pointer to the latest published inventory and index files, replaced atomically by the producer
+PUBLISHED_FILE = "published.json"
+INVENTORY_DIR = os.environ.get("RISK_INVENTORY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".inventory_cache"))
+
+def inventory_key(assets_in_portfolio:pd.DataFrame, spot_moves, vol_moves, seed:int) -> str:
+    """Hash of everything that determines the generated inventory."""
+    params = {
+        "schema": SCHEMA_VERSION,
+        "assets": assets_in_portfolio[["Asset", "Sector", "SubSector", "Desk"]].to_dict(orient="records"),
+        "spot_moves": [float(x) for x in spot_moves],
+        "vol_moves": [float(x) for x in vol_moves],
+        "seed": seed,
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:32]
+
+def inventory_path(key:str, directory:str = None) -> str:
+    return os.path.join(directory or INVENTORY_DIR, f"riskInventory-{key}.arrow")
+
+def index_path(inventory_file:str) -> str:
+    return os.path.join(os.path.dirname(inventory_file), os.path.basename(inventory_file).replace("riskInventory-", "riskIndex-", 1))
+
+def _write_atomic(path:str, write):
+    # write to a temp file and rename so readers never see a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as sink:
+            write(sink)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def _write_table(path:str, table:pa.Table):
+    def write(sink):
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    _write_atomic(path, write)
+
+def save_inventory(df:pd.DataFrame, path:str):
+    """Writes the inventory as an uncompressed Arrow IPC file so it can be memory-mapped on reload."""
+    _write_table(path, pa.Table.from_pandas(df, preserve_index=False))
+
+def load_inventory(path:str, zero_copy:bool = True) -> pd.DataFrame:
+    """
+    Memory-maps an inventory file written by save_inventory.
+
+    With zero_copy the columns are Arrow-backed and point straight into the
+    mapped pages, so loading is near instant and processes reading the same
+    file share one copy in the page cache. Without it the columns are
+    converted to the numpy/object dtypes of the generated frame.
+    """
+    # the mapping is kept alive by the buffers referencing it, do not close it here
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    df = table.to_pandas(types_mapper=pd.ArrowDtype) if zero_copy else table.to_pandas()
+    # the file name carries the content hash, which doubles as the inventory version
+    df.attrs["version"] = os.path.basename(path)
+    return df
+
+def prune_inventories(keep:int = 3, directory:str = None) -> None:
+    """Deletes all but the `keep` most recently written inventory files; mapped files stay readable until unmapped."""
+    directory = directory or INVENTORY_DIR
+    if not os.path.isdir(directory):
+        return
+    paths = [os.path.join(directory, name) for name in os.listdir(directory)
+             if name.startswith("riskInventory-") and name.endswith(".arrow")]
+    for path in sorted(paths, key=os.path.getmtime, reverse=True)[keep:]:
+        for stale in (path, index_path(path)):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                # another process pruned it first, or the inventory was never published
+                pass
+
+def load_or_create_inventory(assets_in_portfolio:pd.DataFrame = None, spot_moves = None, vol_moves = None,
+                             seed:int = 0, workers:int = None, directory:str = None, zero_copy:bool = True) -> pd.DataFrame:
+    """
+    Returns the inventory for the given generation parameters, generating and persisting it on a cache miss.
+
+    Only integer seeds are cached: any other seed (None for fresh entropy, a numpy Generator) does not
+    name a reproducible inventory, so it is generated and returned without touching the store.
+    The worker count does not change the inventory and is not part of the key.
+    """
+    if assets_in_portfolio is None:
+        assets_in_portfolio = pd.DataFrame(riskData.DEFAULT_ASSETS, columns=["Asset", "Sector", "SubSector", "Desk"])
+    spot_moves = riskData.SPOT_MOVES if spot_moves is None else list(spot_moves)
+    vol_moves = riskData.VOL_MOVES if vol_moves is None else list(vol_moves)
+
+    if not isinstance(seed, numbers.Integral) or isinstance(seed, bool):
+        return riskData.initialize_risk_data(assets_in_portfolio, spot_moves, vol_moves, seed=seed, workers=workers)
+    seed = int(seed)
+    path = inventory_path(inventory_key(assets_in_portfolio, spot_moves, vol_moves, seed), directory)
+    if not os.path.exists(path):
+        df = riskData.initialize_risk_data(assets_in_portfolio, spot_moves, vol_moves, seed=seed, workers=workers)
+        save_inventory(df, path)
+    return load_inventory(path, zero_copy)
+
+def publish_inventory(seed:int = 0, directory:str = None) -> str:
+    """
+    Producer side of a shared inventory: writes the inventory and its index layout next to
+    each other and then points published.json at them.
+
+    Consumers map both files read-only, so every process on the host shares one copy of the
+    columns and of the index row positions through the page cache.
+    """
+    directory = directory or INVENTORY_DIR
+    df = load_or_create_inventory(seed=seed, directory=directory)
+    path = os.path.join(directory, df.attrs["version"])
+    rows, groups = RiskIndex(df).layout()
+    table = pa.table({"Row": rows}).replace_schema_metadata({"groups": json.dumps(groups)})
+    _write_table(index_path(path), table)
+    pointer = json.dumps({"inventory": os.path.basename(path), "index": os.path.basename(index_path(path))}).encode()
+    _write_atomic(os.path.join(directory, PUBLISHED_FILE), lambda sink: sink.write(pointer))
+    return path
+
+def published_version(directory:str = None) -> str:
+    with open(os.path.join(directory or INVENTORY_DIR, PUBLISHED_FILE)) as f:
+        return json.load(f)["inventory"]
+
+def attach_inventory(directory:str = None) -> RiskIndex:
+    """
+    Consumer side of a shared inventory: a RiskIndex over the latest published files.
+
+    The frame is Arrow-backed over the mapped inventory and the index row positions are
+    read-only views of the mapped layout; nothing proportional to the row count is copied.
+    """
+    directory = directory or INVENTORY_DIR
+    with open(os.path.join(directory, PUBLISHED_FILE)) as f:
+        published = json.load(f)
+    df = load_inventory(os.path.join(directory, published["inventory"]))
+    table = pa.ipc.open_file(pa.memory_map(os.path.join(directory, published["index"]), "r")).read_all()
+    rows = table.column("Row").chunk(0).to_numpy(zero_copy_only=True)
+    return RiskIndex.from_layout(df, rows, json.loads(table.schema.metadata[b"groups"]))
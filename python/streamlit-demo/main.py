@@ -1,17 +1,14 @@
 import streamlit as st
-import numpy as np
-import GenerateRiskInventory as riskData
 import data_provider as dp
 from common import Query, QueryResponse
-
-@st.cache_data
-def create_risk_data():
-    return riskData.initialize_risk_data()
+from chat_resources import NOT_UNDERSTOOD, create_refresher, current_snapshot, show_chart, translate_prompt
+from query_translator import TranslationError
 
 st.set_page_config(page_title="Discovery", menu_items={
     "About": "Risk and PnL Analysis Bot"
 })
 st.header(":blue[Risk and PnL Analysis Bot]", divider=True)
+create_refresher()
 
 # Initialize chat history
 if "messages" not in st.session_state:
@@ -44,7 +41,7 @@ if prompt := st.chat_input("What can I help with?") or st.session_state.is_strea
         if(st.session_state.content_to_stream=="Chart"):
             left.button("Data", icon=":material/dataset:", on_click=on_button_click, kwargs={"content":"Data"})
             right.button("Meeting", icon=":material/groups:", on_click=on_button_click, kwargs={"content":"Meeting"})
-            st.bar_chart(np.random.randn(30,3))
+            show_chart(last_message["response"].get("handle"))
         elif(st.session_state.content_to_stream=="Data"):
             left.button("Chart", icon=":material/bar_chart:", on_click=on_button_click, kwargs={"content":"Chart"})
             right.button("Meeting", icon=":material/groups:", on_click=on_button_click, kwargs={"content":"Meeting"})
@@ -62,15 +59,20 @@ if prompt := st.chat_input("What can I help with?") or st.session_state.is_strea
 
         # Display assistant response in chat message container
         with st.chat_message("assistant"):
-            raw_response:QueryResponse = dp.query_risk(Query(prompt), create_risk_data())
+            try:
+                raw_response:QueryResponse = dp.query_risk(Query(prompt), current_snapshot().index, translate=translate_prompt)
+            except TranslationError:
+                # the model timed out or failed and the prompt is not a template the parser knows
+                raw_response = QueryResponse(content=NOT_UNDERSTOOD)
             response = st.markdown(raw_response.content)
             if raw_response.source is not None:
                 st.expander("Source").write(raw_response.source)
 
-            left, middle, right = st.columns(3)
-            left.button("Data", icon=":material/dataset:", type="primary", on_click=on_button_click, kwargs={"content":"Data"})
-            middle.button("Chart", icon=":material/bar_chart:", type="primary", on_click=on_button_click, kwargs={"content":"Chart"})
-            right.button("Meeting", icon=":material/groups:", on_click=on_button_click, kwargs={"content":"Meeting"})
+            if raw_response.handle is not None:
+                left, middle, right = st.columns(3)
+                left.button("Data", icon=":material/dataset:", type="primary", on_click=on_button_click, kwargs={"content":"Data"})
+                middle.button("Chart", icon=":material/bar_chart:", type="primary", on_click=on_button_click, kwargs={"content":"Chart"})
+                right.button("Meeting", icon=":material/groups:", on_click=on_button_click, kwargs={"content":"Meeting"})
             
         # Add assistant response to chat history
         st.session_state.messages.append({"role": "assistant", "response": raw_response.create_response()})
\ No newline at end of file
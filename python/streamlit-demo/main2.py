@@ -1,22 +1,25 @@
+import dataclasses
 import streamlit as st
-import numpy as np
-import GenerateRiskInventory as riskData
 import data_provider as dp
 from common import Query, QueryResponse
-
-@st.cache_data
-def create_risk_data():
-    return riskData.initialize_risk_data()
+from chat_resources import INVENTORY_REFRESHED, NOT_UNDERSTOOD, create_refresher, current_snapshot, show_chart, translate_prompt
+from query_translator import TranslationError
+from result_store import ResultStore
 
 st.set_page_config(page_title="Discovery", menu_items={
     "About": "Risk and PnL Analysis Bot"
 })
 st.header(":blue[Risk and PnL Analysis Bot]", divider=True)
+create_refresher()
 
 # Initialize chat history
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# result frames live here, the chat history only keeps their handles
+if "results" not in st.session_state:
+    st.session_state.results = ResultStore()
+
 if 'is_stream' not in st.session_state:
     st.session_state.is_stream = False
 
@@ -33,6 +36,23 @@ def on_button_click(**kwargs):
     st.session_state.is_stream = True
     st.session_state.content_to_stream = kwargs["content"]
 
+# Only the requested page of the result is sorted, projected and sent to the browser
+def show_data_grid(df, key):
+    columns_col, sort_col, order_col, size_col = st.columns([3, 2, 1, 1])
+    # the grid controls keep the Data view open when they trigger a rerun
+    keep_open = {"on_change": on_button_click, "kwargs": {"content": "Data"}}
+    shown = columns_col.multiselect("Columns", list(df.columns), default=list(df.columns), key=f"grid_columns_{key}", **keep_open)
+    sort_by = sort_col.selectbox("Sort by", [None] + list(df.columns), key=f"grid_sort_{key}", **keep_open)
+    ascending = order_col.selectbox("Order", ["Asc", "Desc"], key=f"grid_order_{key}", **keep_open) == "Asc"
+    page_size = size_col.selectbox("Rows", [50, 100, 500], index=1, key=f"grid_size_{key}", **keep_open)
+    num_pages = max(1, -(-len(df) // page_size))
+    page = st.number_input("Page", min_value=1, max_value=num_pages, value=1, key=f"grid_page_{key}_{page_size}", **keep_open)
+
+    rows, total_rows, _ = dp.page_frame(df, page - 1, page_size, sort_by, ascending, shown or None)
+    first = (page - 1) * page_size
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    st.caption(f"Rows {min(first + 1, total_rows)}-{first + len(rows)} of {total_rows}")
+
 # Accept user input
 if prompt := st.chat_input("What can I help with?") or st.session_state.is_stream:
     if st.session_state.is_stream:
@@ -44,12 +64,17 @@ if prompt := st.chat_input("What can I help with?") or st.session_state.is_strea
         if(st.session_state.content_to_stream=="Chart"):
             left.button("Data", icon=":material/dataset:", on_click=on_button_click, kwargs={"content":"Data"})
             right.button("Meeting", icon=":material/groups:", on_click=on_button_click, kwargs={"content":"Meeting"})
-            st.bar_chart(np.random.randn(30,3))
+            show_chart(last_message["response"].handle)
         elif(st.session_state.content_to_stream=="Data"):
             left.button("Chart", icon=":material/bar_chart:", on_click=on_button_click, kwargs={"content":"Chart"})
             right.button("Meeting", icon=":material/groups:", on_click=on_button_click, kwargs={"content":"Meeting"})
-            if(last_message["response"].df is not None):
-                st.write(last_message["response"].df)
+            if(last_message["response"].handle is not None):
+                df = st.session_state.results.get(last_message["response"].handle,
+                                                  lambda handle: dp.result_frame(handle, current_snapshot().index))
+                if df is None:
+                    st.markdown(INVENTORY_REFRESHED)
+                else:
+                    show_data_grid(df, key=len(st.session_state.messages))
         else:
             left.button("Data", icon=":material/dataset:", on_click=on_button_click, kwargs={"content":"Data"})
             right.button("Chart", icon=":material/bar_chart:", on_click=on_button_click, kwargs={"content":"Chart"})
@@ -63,15 +88,21 @@ if prompt := st.chat_input("What can I help with?") or st.session_state.is_strea
 
         # Display assistant response in chat message container
         with st.chat_message("assistant"):
-            raw_response:QueryResponse = dp.query_risk2(Query(prompt), create_risk_data())
+            try:
+                raw_response:QueryResponse = dp.query_risk2(Query(prompt), current_snapshot().index, translate=translate_prompt)
+            except TranslationError:
+                # the model timed out or failed and the prompt is not a template the parser knows
+                raw_response = QueryResponse(content=NOT_UNDERSTOOD)
             response = st.markdown(raw_response.content)
             if raw_response.source is not None:
                 st.expander("Source").write(raw_response.source)
 
-            left, middle, right = st.columns(3)
-            left.button("Data", icon=":material/dataset:", type="primary", on_click=on_button_click, kwargs={"content":"Data"})
-            middle.button("Chart", icon=":material/bar_chart:", type="primary", on_click=on_button_click, kwargs={"content":"Chart"})
-            right.button("Meeting", icon=":material/groups:", on_click=on_button_click, kwargs={"content":"Meeting"})
+            if raw_response.handle is not None:
+                left, middle, right = st.columns(3)
+                left.button("Data", icon=":material/dataset:", type="primary", on_click=on_button_click, kwargs={"content":"Data"})
+                middle.button("Chart", icon=":material/bar_chart:", type="primary", on_click=on_button_click, kwargs={"content":"Chart"})
+                right.button("Meeting", icon=":material/groups:", on_click=on_button_click, kwargs={"content":"Meeting"})
             
         # Add assistant response to chat history
-        st.session_state.messages.append({"role": "assistant", "response": raw_response})
\ No newline at end of file
+        st.session_state.results.put(raw_response.handle, raw_response.df)
+        st.session_state.messages.append({"role": "assistant", "response": dataclasses.replace(raw_response, df=None)})
\ No newline at end of file
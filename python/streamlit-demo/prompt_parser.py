@@ -0,0 +1,132 @@
+import re
+from risk_index import RiskIndex
+
+METRIC_WORDS = {
+    "delta": ["DELTA"], "vega": ["VEGA"], "gamma": ["GAMMA"], "greeks": ["DELTA", "VEGA", "GAMMA"],
+    "spotvol": ["SpotVol"], "spot vol": ["SpotVol"], "spot-vol": ["SpotVol"], "spot/vol": ["SpotVol"],
+}
+FIELD_WORDS = {
+    "asset": "Asset", "assets": "Asset", "sector": "Sector", "sectors": "Sector",
+    "subsector": "SubSector", "subsectors": "SubSector", "sub sector": "SubSector", "sub sectors": "SubSector",
+    "desk": "Desk", "desks": "Desk",
+}
+# words that may surround the template without changing its meaning; anything else makes the parse fail
+FILLER_WORDS = set("""
+    a about across all an and any are as at book by current do does exposure exposures for give have how i in is
+    me much my of on our overall please portfolio position positions risk s sensitivity show tell the to today
+    total what whats with
+""".split())
+# narrowest level first: a value named at two levels resolves to the first of them unless a field noun follows it
+DIMENSION_PRECEDENCE = ["Asset", "SubSector", "Sector", "Desk"]
+DATE = re.compile(r"\b(\d{4})-?(\d{2})-?(\d{2})\b")
+TOKEN = re.compile(r"[A-Za-z0-9&]+(?:[./\-][A-Za-z0-9&]+)*")
+
+def tokenize(text:str) -> list:
+    return TOKEN.findall(text)
+
+class PromptParser:
+    """
+    Deterministic translation of template prompts into queries.
+
+    Metric words, dimension values of the live inventory and "by <field>" group-bys are held in
+    a word trie; a prompt is read left to right taking the longest phrase at each word. A field
+    noun right after a value ("the Equity desk") only names the value's level. Prompts that name
+    no metric or contain words outside the vocabulary are left to the model.
+    """
+
+    def __init__(self, index:RiskIndex):
+        self.version = index.version
+        self._trie = {}
+        for phrase, metrics in METRIC_WORDS.items():
+            self._add(phrase, ("metric", metrics))
+        for phrase, field in FIELD_WORDS.items():
+            self._add("by " + phrase, ("group_by", field))
+            self._add(phrase, ("field", field))
+        self._values = {}
+        for field in DIMENSION_PRECEDENCE:
+            self._values[field] = set().union(*(values for (_, f), values in index.values.items() if f == field))
+            for value in self._values[field]:
+                self._add(str(value), ("filter", field, value))
+
+    def _add(self, phrase:str, entry:tuple):
+        node = self._trie
+        for word in tokenize(phrase.lower()):
+            node = node.setdefault(word, {})
+        node.setdefault(None, entry)
+
+    def _match(self, words:list, start:int):
+        # longest phrase starting at words[start]
+        node, entry, end = self._trie, None, start
+        for i in range(start, len(words)):
+            node = node.get(words[i])
+            if node is None:
+                break
+            if None in node:
+                entry, end = node[None], i + 1
+        return entry, end
+
+    def _relevel(self, filters:dict, last:tuple, field:str) -> bool:
+        # moves the value just read to the level named after it, False when it has no such level
+        last_field, value = last
+        if last_field == field:
+            return True
+        if value not in self._values[field]:
+            return False
+        filters[last_field].remove(value)
+        if not filters[last_field]:
+            del filters[last_field]
+        values = filters.setdefault(field, [])
+        if value not in values:
+            values.append(value)
+        return True
+
+    def parse(self, prompt:str, strict:bool = True):
+        """
+        Returns the query for a template prompt, or None when the prompt needs the model.
+
+        With strict=False words outside the vocabulary are skipped instead, a best-effort reading
+        for when the model cannot answer.
+        """
+        start_date = None
+        date = DATE.search(prompt)
+        if date is not None:
+            start_date = "".join(date.groups())
+            prompt = prompt[:date.start()] + prompt[date.end():]
+
+        raw = tokenize(prompt)
+        words = [word.lower() for word in raw]
+        metrics, filters, group_by = [], {}, []
+        # (field, value) of the filter read last, while nothing else has followed it
+        last = None
+        i = 0
+        while i < len(words):
+            entry, end = self._match(words, i)
+            # one and two letter tickers (V, MA) only count when written in capitals
+            if entry is not None and entry[0] == "filter" and entry[1] == "Asset" and len(raw[i]) <= 2 and not raw[i].isupper():
+                entry, end = None, i + 1
+            if entry is None:
+                if strict and words[i] not in FILLER_WORDS:
+                    return None
+                last = None
+                i += 1
+                continue
+            if entry[0] == "field":
+                if (last is None or not self._relevel(filters, last, entry[1])) and strict:
+                    return None
+            elif entry[0] == "metric":
+                metrics.extend(m for m in entry[1] if m not in metrics)
+            elif entry[0] == "group_by":
+                group_by.append(entry[1])
+            else:
+                values = filters.setdefault(entry[1], [])
+                if entry[2] not in values:
+                    values.append(entry[2])
+            last = entry[1:] if entry[0] == "filter" else None
+            i = end
+
+        if not metrics:
+            return None
+        return {"start_date": start_date, "metrics": metrics, "group_by": group_by,
+                "filters": [{"filter_field": field, "operator": "==", "filter_value": values[0]} if len(values) == 1
+                            else {"filter_field": field, "operator": "in", "filter_value": values}
+                            for field, values in filters.items()]}
@@ -0,0 +1,55 @@
+import json
+import threading
+from cachetools import TTLCache
+
+class QueryCache:
+    """
+    Bounded LRU/TTL cache of QueryResponses and chart frames shared by every session in the process.
+
+    Entries are keyed on the normalized query plus the inventory version; when a query arrives
+    for a new inventory version everything cached for the old one is dropped. Cached responses
+    and chart frames are shared, so they must be treated as read-only; row answers are cached as
+    row positions rather than frames, so the cache does not keep result frames alive.
+    """
+
+    def __init__(self, maxsize:int = 1024, ttl:float = 600):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query:dict, kind:str) -> str:
+        return kind + ":" + json.dumps(query, sort_keys=True, default=str)
+
+    def get_or_compute(self, query:dict, version, compute, kind:str = "response"):
+        """Returns the cached response for the query, calling compute() on a miss."""
+        key = self.make_key(query, kind)
+        with self._lock:
+            if version != self.version:
+                self._cache.clear()
+                self.version = version
+            response = self._cache.get(key)
+            if response is not None:
+                self.hits += 1
+                return response
+            self.misses += 1
+        # computed outside the lock so slow queries do not block cache hits of other sessions
+        response = compute()
+        with self._lock:
+            if version == self.version:
+                self._cache[key] = response
+        return response
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+            self.version = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "version": self.version}
+
+# process wide cache shared by all Streamlit sessions
+QUERY_CACHE = QueryCache()
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import threading
+from cachetools import LRUCache
+import data_provider as dp
+
+class TranslationError(Exception):
+    pass
+
+class StubModelServer:
+    """
+    Local stand-in for the model endpoint.
+
+    Speaks newline-delimited JSON over TCP: each {"prompt": ...} line is answered, after
+    `latency` seconds, with a {"query": ...} line produced by data_provider.create_query.
+    """
+
+    def __init__(self, latency:float = 0.2, host:str = "127.0.0.1", port:int = 0):
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self._server = None
+        self._connections = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        # close open connections so their handlers see EOF and finish before the loop goes away
+        for writer in list(self._connections):
+            writer.close()
+        while self._connections:
+            await asyncio.sleep(0)
+        await self._server.wait_closed()
+
+    async def _handle(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                await asyncio.sleep(self.latency)
+                writer.write((json.dumps({"query": dp.create_query(request["prompt"])}) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+class ModelBackend:
+    """Client of a model server with a pool of at most `pool_size` reusable connections."""
+
+    def __init__(self, host:str, port:int, pool_size:int = 4):
+        self.host = host
+        self.port = port
+        self._idle = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def translate(self, prompt:str) -> dict:
+        async with self._slots:
+            reader, writer = self._idle.pop() if self._idle else await asyncio.open_connection(self.host, self.port)
+            try:
+                writer.write((json.dumps({"prompt": prompt}) + "\n").encode())
+                await writer.drain()
+                line = await reader.readline()
+                if not line:
+                    raise ConnectionError("model server closed the connection")
+            except BaseException:
+                # a failed or cancelled request leaves the connection in an unknown state
+                writer.close()
+                raise
+            self._idle.append((reader, writer))
+        return json.loads(line)["query"]
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+class QueryTranslator:
+    """
+    Asynchronous prompt to query translation in front of a pluggable backend.
+
+    Results are cached per prompt, concurrent requests for the same prompt share one backend
+    call, and each call waits at most `timeout` seconds before the optional `fallback` answers
+    instead. A backend call that outlives its timeout still completes and fills the cache.
+    """
+
+    def __init__(self, backend, timeout:float = 2.0, cache_size:int = 1024, fallback = None):
+        self.backend = backend
+        self.timeout = timeout
+        self.fallback = fallback
+        self._cache = LRUCache(maxsize=cache_size)
+        self._inflight = {}
+        self.stats = {"hits": 0, "backend_calls": 0, "coalesced": 0, "fallbacks": 0}
+
+    @staticmethod
+    def normalize_prompt(prompt:str) -> str:
+        return " ".join(prompt.lower().split())
+
+    async def translate(self, prompt:str, timeout:float = None) -> dict:
+        key = self.normalize_prompt(prompt)
+        if key in self._cache:
+            self.stats["hits"] += 1
+            return self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["backend_calls"] += 1
+            task = asyncio.ensure_future(self._call_backend(key, prompt))
+            # nobody may be left waiting on a timed out call, retrieve its exception so it is not reported
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        else:
+            self.stats["coalesced"] += 1
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout if timeout is None else timeout)
+        except (asyncio.TimeoutError, OSError, ValueError, KeyError) as error:
+            query = self.fallback(prompt) if self.fallback is not None else None
+            if query is None:
+                raise TranslationError(f"could not translate {prompt!r}") from error
+            self.stats["fallbacks"] += 1
+            return query
+
+    async def _call_backend(self, key:str, prompt:str) -> dict:
+        try:
+            query = await self.backend.translate(prompt)
+            self._cache[key] = query
+            return query
+        finally:
+            self._inflight.pop(key, None)
+
+class TranslationService:
+    """
+    Runs the stub model server and a QueryTranslator on a background event loop.
+
+    Streamlit scripts are synchronous; translate() hands the prompt to the loop and waits for
+    the result, so concurrent sessions share the connection pool, cache and in-flight calls.
+    `fallback` answers prompts the model fails on or does not answer within `timeout`.
+    """
+
+    def __init__(self, latency:float = 0.2, pool_size:int = 4, timeout:float = 2.0, fallback = None):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="query-translator", daemon=True).start()
+        self.server = self._run(StubModelServer(latency).start())
+        self.backend = ModelBackend(self.server.host, self.server.port, pool_size)
+        self.translator = QueryTranslator(self.backend, timeout, fallback=fallback)
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def translate(self, prompt:str) -> dict:
+        return self._run(self.translator.translate(prompt))
+
+    def close(self):
+        self._run(self.backend.close())
+        self._run(self.server.stop())
+        self.loop.call_soon_threadsafe(self.loop.stop)
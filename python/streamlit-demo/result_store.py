@@ -0,0 +1,51 @@
+from collections import OrderedDict
+import pandas as pd
+from common import ResultHandle
+
+class ResultStore:
+    """
+    Per-session store of the result frames behind the handles kept in the chat history.
+
+    Frames are kept within `budget_bytes`, least recently used first out. A frame that was
+    evicted, or was too large to keep, is rebuilt through `rebuild` when it is asked for again,
+    so a session's memory stays bounded however long the conversation runs.
+    """
+
+    def __init__(self, budget_bytes:int = 64 * 2**20):
+        self.budget_bytes = budget_bytes
+        self.nbytes = 0
+        self._frames = OrderedDict()
+
+    @staticmethod
+    def frame_bytes(df:pd.DataFrame) -> int:
+        return int(df.memory_usage(index=True, deep=True).sum())
+
+    def put(self, handle:ResultHandle, df:pd.DataFrame) -> None:
+        if handle is None or df is None:
+            return
+        self.discard(handle)
+        size = self.frame_bytes(df)
+        if size > self.budget_bytes:
+            return
+        self._frames[handle] = (df, size)
+        self.nbytes += size
+        while self.nbytes > self.budget_bytes:
+            _, (_, evicted) = self._frames.popitem(last=False)
+            self.nbytes -= evicted
+
+    def get(self, handle:ResultHandle, rebuild) -> pd.DataFrame:
+        """Returns the frame for the handle, calling rebuild(handle) when it is not held."""
+        if handle in self._frames:
+            self._frames.move_to_end(handle)
+            return self._frames[handle][0]
+        df = rebuild(handle)
+        self.put(handle, df)
+        return df
+
+    def discard(self, handle:ResultHandle) -> None:
+        if handle in self._frames:
+            _, size = self._frames.pop(handle)
+            self.nbytes -= size
+
+    def __len__(self):
+        return len(self._frames)
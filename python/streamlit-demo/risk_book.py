@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import GenerateRiskInventory as riskData
+
+OPTION_COLUMNS = ["Asset", "CallOrPut", "Strike", "Tenor", "Quantity", "LongShort"]
+
+class RiskBook:
+    """
+    Normalized risk inventory that is updated in place as trades book and market data ticks.
+
+    Each change only reprices the option positions it touches and the delta hedge
+    of their asset. Positions are identified by the PositionId index of
+    `inventory.positions`, and `version` is bumped on every change so anything
+    derived from the inventory knows when to rebuild.
+    """
+
+    def __init__(self, inventory:riskData.NormalizedInventory, market:pd.DataFrame = None):
+        hedges = inventory.positions[inventory.positions["Type"] == "Hedge"]
+        if market is None:
+            market = pd.DataFrame({"Spot": riskData.SPOT, "Vol": riskData.VOL, "Rate": riskData.RATE},
+                                  index=pd.Index(hedges["Asset"].to_numpy(), name="Asset"))
+        self.inventory = inventory
+        self.inventory.positions = inventory.positions.set_axis(pd.RangeIndex(len(inventory.positions), name="PositionId"))
+        self.market = market.astype(float)
+        self.version = 0
+        self._next_id = len(inventory.positions)
+
+    @classmethod
+    def generate(cls, **kwargs):
+        """Builds a book from a freshly generated inventory, see initialize_risk_data for the arguments."""
+        return cls(riskData.initialize_risk_data(normalized=True, **kwargs))
+
+    def to_long(self, compact:bool = False) -> pd.DataFrame:
+        return self.inventory.to_long(compact)
+
+    def add_positions(self, positions:pd.DataFrame) -> pd.Index:
+        """
+        Books new option positions and returns their PositionIds.
+
+        Positions on an asset that is not in the book yet also need Sector, SubSector and Desk columns.
+        """
+        missing = [column for column in OPTION_COLUMNS if column not in positions.columns]
+        if missing:
+            raise ValueError(f"positions are missing columns {missing}")
+
+        new_ids = []
+        for asset, trades in positions.groupby("Asset", sort=False):
+            if asset not in self.market.index:
+                self._add_asset(asset, trades.iloc[0])
+            rows = self._asset_rows(asset)
+            hedge = self.inventory.positions.iloc[rows[-1]]
+            market = self.market.loc[asset]
+
+            table = pd.DataFrame({
+                "Position": riskData.build_position_names(np.full(len(trades), asset, dtype=object), trades["CallOrPut"].to_numpy(),
+                                                          trades["Strike"].to_numpy(dtype=float), trades["Tenor"].to_numpy(dtype=float)),
+                "AssetIndex": hedge["AssetIndex"],
+                "Asset": asset,
+                "Sector": hedge["Sector"],
+                "SubSector": hedge["SubSector"],
+                "Desk": hedge["Desk"],
+                "Type": np.where(trades["CallOrPut"].to_numpy() == 1, "Call", "Put").astype(object),
+                "CallOrPut": trades["CallOrPut"].to_numpy(dtype=np.int64),
+                "Strike": trades["Strike"].to_numpy(dtype=float),
+                "Tenor": trades["Tenor"].to_numpy(dtype=float),
+                "Quantity": trades["Quantity"].to_numpy(dtype=float),
+                "LongShort": trades["LongShort"].to_numpy(dtype=np.int64),
+            }, index=pd.RangeIndex(self._next_id, self._next_id + len(trades), name="PositionId"))
+            self._next_id += len(trades)
+            greeks, pnl = riskData.value_positions(table, market["Spot"], market["Rate"], market["Vol"],
+                                                   self.inventory.spot_moves, self.inventory.vol_moves)
+
+            # keep the asset's options ahead of its hedge
+            self._insert(rows[-1], table, greeks, pnl)
+            self._rehedge(asset)
+            new_ids.extend(table.index)
+
+        self.version += 1
+        return pd.Index(new_ids, name="PositionId")
+
+    def remove_positions(self, position_ids) -> None:
+        """Removes option positions by PositionId; the delta hedges are not removable."""
+        table = self.inventory.positions
+        rows = table.index.get_indexer(pd.Index(position_ids))
+        if (rows < 0).any():
+            raise KeyError(f"unknown positions {list(np.asarray(position_ids)[rows < 0])}")
+        if (table["Type"].to_numpy()[rows] == "Hedge").any():
+            raise ValueError("delta hedge positions cannot be removed")
+
+        keep = np.ones(len(table), dtype=bool)
+        keep[rows] = False
+        assets = table["Asset"].iloc[rows].unique()
+        self.inventory.positions = table[keep]
+        self.inventory.greeks = self.inventory.greeks[keep]
+        self.inventory.scenarios = self.inventory.scenarios[keep]
+        for asset in assets:
+            self._rehedge(asset)
+        self.version += 1
+
+    def update_market(self, asset:str, spot:float = None, vol:float = None, rate:float = None) -> None:
+        """Moves the spot, vol and/or rate of one asset and reprices its positions."""
+        if asset not in self.market.index:
+            raise KeyError(f"unknown asset {asset}")
+        for column, value in (("Spot", spot), ("Vol", vol), ("Rate", rate)):
+            if value is not None:
+                self.market.loc[asset, column] = float(value)
+
+        options = self._asset_rows(asset)[:-1]
+        market = self.market.loc[asset]
+        greeks, pnl = riskData.value_positions(self.inventory.positions.iloc[options], market["Spot"], market["Rate"], market["Vol"],
+                                               self.inventory.spot_moves, self.inventory.vol_moves)
+        self.inventory.greeks[options] = greeks
+        self.inventory.scenarios[options] = pnl
+        self._rehedge(asset)
+        self.version += 1
+
+    def _asset_rows(self, asset:str) -> np.ndarray:
+        # rows of the asset's options followed by its hedge
+        return np.flatnonzero(self.inventory.positions["Asset"].to_numpy() == asset)
+
+    def _rehedge(self, asset:str) -> None:
+        rows = self._asset_rows(asset)
+        hedge_delta = -1 * self.inventory.greeks[rows[:-1], 0].sum()
+        self.inventory.greeks[rows[-1], 0] = hedge_delta
+        self.inventory.scenarios[rows[-1]] = hedge_delta * self.inventory.spot_moves[:, None]
+
+    def _add_asset(self, asset:str, trade:pd.Series) -> None:
+        missing = [column for column in ["Sector", "SubSector", "Desk"] if column not in trade.index]
+        if missing:
+            raise ValueError(f"new asset {asset} needs {missing}")
+        hedge = pd.DataFrame({
+            "Position": [asset], "AssetIndex": [len(self.market)], "Asset": [asset],
+            "Sector": [trade["Sector"]], "SubSector": [trade["SubSector"]], "Desk": [trade["Desk"]],
+            "Type": ["Hedge"], "CallOrPut": [0], "Strike": [np.nan], "Tenor": [np.nan], "Quantity": [np.nan], "LongShort": [0],
+        }, index=pd.RangeIndex(self._next_id, self._next_id + 1, name="PositionId"))
+        self._next_id += 1
+        grid_shape = (1, len(self.inventory.spot_moves), len(self.inventory.vol_moves))
+        self._insert(len(self.inventory.positions), hedge, np.array([[0.0, np.nan, np.nan]]), np.zeros(grid_shape))
+        self.market.loc[asset] = [riskData.SPOT, riskData.VOL, riskData.RATE]
+
+    def _insert(self, row:int, table:pd.DataFrame, greeks:np.ndarray, pnl:np.ndarray) -> None:
+        positions = self.inventory.positions
+        self.inventory.positions = pd.concat([positions.iloc[:row], table, positions.iloc[row:]])
+        self.inventory.greeks = np.insert(self.inventory.greeks, row, greeks, axis=0)
+        self.inventory.scenarios = np.insert(self.inventory.scenarios, row, pnl, axis=0)
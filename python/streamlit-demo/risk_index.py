@@ -0,0 +1,117 @@
+import bisect
+import itertools
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ["Asset", "Sector", "SubSector", "Desk"]
+# grid coordinates only exist on SpotVol rows, Greek rows have them missing and drop out of the groups
+INDEXED_FIELDS = DIMENSIONS + ["SpotMove", "VolMove"]
+
+# fallback version stamps for frames that were not loaded through inventory_store
+_versions = itertools.count(1)
+
+class RiskIndex:
+    """
+    Pre-aggregated sums and grouped row positions over one version of the risk inventory.
+
+    Built once per inventory and shared by every query: totals by (Metric, dimension value)
+    and the matching rows are dict lookups instead of boolean-mask scans over the frame.
+    """
+
+    def __init__(self, df:pd.DataFrame, version = None):
+        self.df = df
+        self.version = version if version is not None else df.attrs.get("version", next(_versions))
+        by_metric = df.groupby("Metric", sort=False, observed=True)
+        self.metric_totals = {metric: float(total) for metric, total in by_metric["RiskValue"].sum().items()}
+        self.metric_rows = dict(by_metric.indices)
+        self.sums = {}
+        self.rows = {}
+        self.values = {}
+        for field in INDEXED_FIELDS:
+            grouped = df.groupby(["Metric", field], sort=False, observed=True)
+            for (metric, value), total in grouped["RiskValue"].sum().items():
+                self.sums[(metric, field, value)] = float(total)
+            for (metric, value), rows in grouped.indices.items():
+                self.rows[(metric, field, value)] = rows
+                self.values.setdefault((metric, field), []).append(value)
+        self._sort_values()
+
+    def _sort_values(self):
+        # sorted distinct values per (Metric, field) answer range lookups with a binary search
+        for values in self.values.values():
+            values.sort()
+
+    def layout(self):
+        """
+        Flat form of the index for publishing next to the inventory file.
+
+        Returns:
+            One array with every group's row positions back to back, and a list of
+            [metric, field, value, start, stop, total] entries locating each group in it;
+            field and value are None for the per-metric groups.
+        """
+        groups, offset = [], 0
+        entries = [((metric, None, None), rows, self.metric_totals[metric]) for metric, rows in self.metric_rows.items()]
+        entries += [(key, rows, self.sums[key]) for key, rows in self.rows.items()]
+        for (metric, field, value), rows, total in entries:
+            value = value.item() if isinstance(value, np.generic) else value
+            groups.append([metric, field, value, offset, offset + len(rows), total])
+            offset += len(rows)
+        rows = np.concatenate([rows for _, rows, _ in entries]) if entries else np.empty(0, dtype=np.intp)
+        return rows.astype(np.int64, copy=False), groups
+
+    @classmethod
+    def from_layout(cls, df:pd.DataFrame, rows:np.ndarray, groups:list, version = None):
+        """
+        Rebuilds an index from layout() output without grouping the frame again.
+
+        The row positions of every group are views into `rows`, so an index over a
+        memory-mapped layout adds no per-row memory to the process.
+        """
+        index = cls.__new__(cls)
+        index.df = df
+        index.version = version if version is not None else df.attrs.get("version", next(_versions))
+        index.metric_totals, index.metric_rows, index.sums, index.rows, index.values = {}, {}, {}, {}, {}
+        for metric, field, value, start, stop, total in groups:
+            if field is None:
+                index.metric_totals[metric] = total
+                index.metric_rows[metric] = rows[start:stop]
+            else:
+                index.sums[(metric, field, value)] = total
+                index.rows[(metric, field, value)] = rows[start:stop]
+                index.values.setdefault((metric, field), []).append(value)
+        index._sort_values()
+        return index
+
+    def total(self, metric:str, dimension:str = None, value = None) -> float:
+        """Summed RiskValue of a metric, for the whole book or one dimension value."""
+        if dimension is None:
+            return self.metric_totals.get(metric, 0.0)
+        return self.sums.get((metric, dimension, value), 0.0)
+
+    def row_positions(self, metric:str, dimension:str, value) -> np.ndarray:
+        return self.rows.get((metric, dimension, value), np.empty(0, dtype=np.intp))
+
+    def matching_values(self, metric:str, field:str, operator:str, value) -> list:
+        """Distinct values of an indexed field that satisfy an ==, in or between filter."""
+        if operator == "==":
+            return [value]
+        if operator == "in":
+            return list(value)
+        if operator == "between":
+            values = self.values.get((metric, field), [])
+            low, high = value
+            return values[bisect.bisect_left(values, low):bisect.bisect_right(values, high)]
+        raise ValueError(f"unsupported filter operator {operator}")
+
+    def lookup(self, metric:str, field:str, operator:str, value) -> np.ndarray:
+        """Sorted row positions of a metric matching a filter on an indexed field."""
+        rows = [self.row_positions(metric, field, v) for v in self.matching_values(metric, field, operator, value)]
+        if not rows:
+            return np.empty(0, dtype=np.intp)
+        # rows of distinct values never overlap
+        return np.sort(np.concatenate(rows))
+
+    def estimate(self, metric:str, field:str, operator:str, value) -> int:
+        """Number of rows a filter on an indexed field keeps, without materialising them."""
+        return sum(len(self.row_positions(metric, field, v)) for v in self.matching_values(metric, field, operator, value))
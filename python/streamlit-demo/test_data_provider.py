@@ -0,0 +1,44 @@
+import contextlib
+import io
+import pandas as pd
+import pytest
+import GenerateRiskInventory as riskData
+import data_provider as dp
+from query_cache import QueryCache
+from risk_index import RiskIndex
+
+
+@pytest.fixture(scope="module")
+def index():
+    assets = pd.DataFrame(riskData.DEFAULT_ASSETS[:3], columns=["Asset", "Sector", "SubSector", "Desk"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        return RiskIndex(riskData.initialize_risk_data(assets, seed=1))
+
+
+def totals(query, index, with_rows):
+    result, _ = dp.run_query(dp.normalize_query(query), index, with_rows=with_rows)
+    return result
+
+
+@pytest.mark.parametrize("with_rows", [False, True])
+@pytest.mark.parametrize("scenario", [{"spot_moves": [0.05]},
+                                      {"filters": [{"filter_field": "SpotMove", "operator": "in", "filter_value": [0.05]}]}])
+def test_scenario_slice_only_restricts_spotvol(index, scenario, with_rows):
+    asset = {"filter_field": "Asset", "filter_value": "AAPL"}
+    sliced = {"metrics": ["VEGA", "GAMMA", "SpotVol"], **scenario}
+    sliced["filters"] = [asset] + scenario.get("filters", [])
+    result = totals(sliced, index, with_rows)
+
+    whole = totals({"metrics": ["VEGA", "GAMMA"], "filters": [asset]}, index, with_rows)
+    ladder = totals({"metrics": ["SpotVol"], "filters": [asset], "group_by": ["SpotMove"]}, index, True)
+    assert result["VEGA"] == pytest.approx(whole["VEGA"]) and result["VEGA"] != 0
+    assert result["GAMMA"] == pytest.approx(whole["GAMMA"])
+    assert result["SpotVol"] == pytest.approx(ladder[("SpotVol", 0.05)])
+
+
+def test_rows_response_keeps_greek_rows_with_a_slice(index):
+    query = dp.normalize_query({"metrics": ["VEGA", "SpotVol"], "filters": [{"filter_field": "Asset", "filter_value": "AAPL"}],
+                                "spot_moves": [0.05]})
+    df = dp.rows_response(query, index, QueryCache()).df
+    assert set(df["Metric"]) == {"VEGA", "SpotVol"}
+    assert set(df.loc[df["Metric"] == "SpotVol", "SpotMove"]) == {0.05}
@@ -0,0 +1,58 @@
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+import GenerateRiskInventory as riskData
+from benchmark_risk_inventory import S, r, sigma, random_positions, scalar_valuation
+
+
+def scalar_inventory(assets:pd.DataFrame, positions:pd.DataFrame, spot_moves, vol_moves) -> pd.DataFrame:
+    """The original row-by-row inventory loop, priced one position and one grid point at a time."""
+    rows = []
+    for asset_index, asset in assets.iterrows():
+        dimensions = {field: asset[field] for field in ["Asset", "Sector", "SubSector", "Desk"]}
+        hedge = 0.0
+        for _, p in positions[positions["AssetIndex"] == asset_index].iterrows():
+            cp, K, T, notional = p["CallOrPut"], p["Strike"], p["Tenor"], p["LongShort"] * p["Quantity"]
+            name = f"{asset['Asset']} {'Call' if cp == 1 else 'Put'} {np.float64(K).round(2)} {np.float64(T).round(2)}Y"
+            delta = notional * riskData.black_scholes_delta(cp, S, K, r, sigma, T)
+            hedge -= delta
+            for metric, value in [("DELTA", delta),
+                                  ("VEGA", notional * riskData.black_scholes_vega(S, K, r, sigma, T)),
+                                  ("GAMMA", notional * riskData.black_scholes_gamma(S, K, r, sigma, T))]:
+                rows.append({"Position": name, "Metric": metric, "RiskValue": value, "SpotMove": np.nan, "VolMove": np.nan, **dimensions})
+            original_price = riskData.black_scholes_price(cp, S, K, r, sigma, T)
+            for spot_move in spot_moves:
+                for vol_move in vol_moves:
+                    new_price = riskData.black_scholes_price(cp, S * (1 + spot_move), K, r, sigma * (1 + vol_move), T)
+                    rows.append({"Position": name, "Metric": "SpotVol", "RiskValue": notional * (new_price - original_price),
+                                 "SpotMove": spot_move, "VolMove": vol_move, **dimensions})
+        rows.append({"Position": asset["Asset"], "Metric": "DELTA", "RiskValue": hedge, "SpotMove": np.nan, "VolMove": np.nan, **dimensions})
+        for spot_move in spot_moves:
+            for vol_move in vol_moves:
+                rows.append({"Position": asset["Asset"], "Metric": "SpotVol", "RiskValue": hedge * spot_move,
+                             "SpotMove": spot_move, "VolMove": vol_move, **dimensions})
+    return pd.DataFrame(rows)
+
+
+def test_price_positions_matches_scalar_pricing():
+    positions = random_positions(1000)
+    expected = scalar_valuation(positions)
+    actual = riskData.price_positions(**positions, S=S, r=r, sigma=sigma)
+    for metric in expected:
+        np.testing.assert_allclose(actual[metric], expected[metric], rtol=1e-12, atol=1e-9, err_msg=metric)
+
+
+def test_inventory_matches_scalar_reference():
+    assets = pd.DataFrame(riskData.DEFAULT_ASSETS[:5], columns=["Asset", "Sector", "SubSector", "Desk"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        inventory = riskData.initialize_risk_data(assets, seed=7)
+    positions = riskData.generate_positions(assets, np.random.default_rng(7))
+    expected = scalar_inventory(assets, positions, riskData.SPOT_MOVES, riskData.VOL_MOVES)
+
+    assert len(inventory) == len(expected)
+    for column in ["Position", "Metric", "Asset", "Sector", "SubSector", "Desk"]:
+        assert inventory[column].tolist() == expected[column].tolist(), column
+    for column in ["SpotMove", "VolMove"]:
+        np.testing.assert_array_equal(inventory[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float))
+    np.testing.assert_allclose(inventory["RiskValue"].to_numpy(), expected["RiskValue"].to_numpy(), rtol=1e-9, atol=1e-6)